@@ -1,25 +1,229 @@
 import os
+import re
 import time
 import json
 import requests
-import xml.etree.ElementTree as ET
-from urllib.parse import quote
+import urllib3
+from io import BytesIO
+from collections import defaultdict
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, quote_plus
 from openai import OpenAI
 # Import the full openai module for error handling
 import openai
 import logging
+from .retry import exponential_delay, is_retryable_status, retry_after
+from .search_cache import DiskCache, SingleFlight, make_key
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+# Prefer the libxml2-backed parser when it is installed
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+# Logging is configured by the application; this module only emits records
 logger = logging.getLogger(__name__)
 
+# Failures while downloading a feed; reading the raw stream raises urllib3's own
+# errors (e.g. ProtocolError on a connection reset) rather than requests'
+_TRANSPORT_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError)
+
+# Matches any CJK unified ideograph
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+# English rewrites for Chinese queries, checked in order; the first keyword
+# found in the query wins ("模型" also covers "大模型")
+_ENHANCED_QUERIES = {
+    "骨科": "(orthopedics OR orthopedic) OR ((bone OR joint) AND (AI OR model))",
+    "模型": "(large language model OR LLM OR deep learning model OR AI model OR large model)",
+    "麻醉": "(anesthesia OR anesthetic OR anesthesiology) AND (AI OR model OR machine learning)",
+}
+
+# Accepted sortBy values; anything else falls back to relevance
+_SORT_PARAMS = {
+    "relevance": "relevance",
+    "lastUpdatedDate": "lastUpdatedDate",
+    "submittedDate": "submittedDate"
+}
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+ARXIV_NS = 'http://arxiv.org/schemas/atom'
+ENTRY_TAG = f'{{{ATOM_NS}}}entry'
+
+_TITLE_TAG = f'{{{ATOM_NS}}}title'
+_SUMMARY_TAG = f'{{{ATOM_NS}}}summary'
+_PUBLISHED_TAG = f'{{{ATOM_NS}}}published'
+_UPDATED_TAG = f'{{{ATOM_NS}}}updated'
+_ID_TAG = f'{{{ATOM_NS}}}id'
+_AUTHOR_TAG = f'{{{ATOM_NS}}}author'
+_NAME_TAG = f'{{{ATOM_NS}}}name'
+_LINK_TAG = f'{{{ATOM_NS}}}link'
+_CATEGORY_TAG = f'{{{ATOM_NS}}}category'
+
+# Last path segment of an entry id without its version suffix,
+# e.g. http://arxiv.org/abs/2101.00001v2 -> 2101.00001
+_ID_RE = re.compile(r'([^/]+?)(?:v\d+)?$')
+
+
+@dataclass(frozen=True, slots=True)
+class Paper:
+    """A single arXiv search result."""
+    paper_id: str
+    title: str
+    summary: str
+    authors: tuple
+    published: str | None
+    updated: str | None
+    url: str
+    pdf_url: str | None
+    categories: tuple
+    doi: str | None
+    source: str = 'arxiv'
+    
+    def to_dict(self):
+        """Return the paper as a plain dict (e.g. for JSON serialization)."""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a paper from the output of to_dict, e.g. after a JSON round trip."""
+        return cls(**{**data, 'authors': tuple(data['authors']), 'categories': tuple(data['categories'])})
+
+
+def _parse_entry(entry):
+    """Convert an Atom <entry> element into a Paper."""
+    # Group the children by tag in one walk instead of searching the entry per field
+    children = defaultdict(list)
+    for child in entry:
+        children[child.tag].append(child)
+    
+    def first_text(tag):
+        # '' for present-but-empty elements, None for missing ones
+        elems = children.get(tag)
+        return (elems[0].text or '') if elems else None
+    
+    title_text = (first_text(_TITLE_TAG) or '').strip() or "Untitled"
+    summary_text = (first_text(_SUMMARY_TAG) or '').strip() or "No summary available"
+    published_text = first_text(_PUBLISHED_TAG)
+    updated_text = first_text(_UPDATED_TAG)
+    
+    authors = tuple(
+        name.text
+        for author in children.get(_AUTHOR_TAG, ())
+        for name in author.iterfind(_NAME_TAG) if name.text
+    )
+    
+    # Classify links; later links of the same kind win, as arXiv lists them in order
+    link_elems = children.get(_LINK_TAG, ())
+    links = {
+        ('pdf' if link.get('title') == 'pdf' else 'html'): link.get('href', '')
+        for link in link_elems
+        if link.get('title') == 'pdf' or link.get('type') == 'text/html'
+    }
+    doi = next((link.get('href') for link in reversed(link_elems) if link.get('title') == 'doi'), None)
+    
+    raw_id = first_text(_ID_TAG)
+    paper_id = _ID_RE.search(raw_id).group(1) if raw_id else "unknown"
+    
+    categories = tuple(term for c in children.get(_CATEGORY_TAG, ()) if (term := c.get('term')))
+    
+    # 格式化为更友好的对象
+    return Paper(
+        paper_id=paper_id,
+        title=title_text,
+        summary=summary_text,
+        authors=authors,
+        published=published_text[:10] if published_text else None,  # 只保留日期部分
+        updated=updated_text[:10] if updated_text else None,  # 只保留日期部分
+        url=links.get('html') or f"https://arxiv.org/abs/{paper_id}",  # 确保总是有URL
+        pdf_url=links.get('pdf'),
+        categories=categories,
+        doi=doi
+    )
+
 class Arxiv:
-    def __init__(self, timeout=30, max_retries=3, base_delay=1.0):
+    # Identical searches running concurrently (e.g. several agents researching
+    # the same topic) share one request, across all client instances
+    _inflight = SingleFlight()
+    
+    # A duplicate of a running search joins it instead of sending a request, so
+    # callers gain nothing by hedging searches with a second attempt
+    hedgeable = False
+    
+    def __init__(self, timeout=30, max_retries=3, base_delay=1.0, max_workers=8, cache_ttl=86400,
+                 max_delay=30.0, jitter=0.5, session=None):
         self.timeout = timeout
         self.max_retries = max_retries
         self.base_delay = base_delay
+        # Retries back off exponentially up to max_delay, plus up to `jitter` of the
+        # delay at random so that clients do not retry in lockstep
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
         self.base_url = "http://export.arxiv.org/api/query"
         
+        # Keep-alive session shared by all searches (including search_many workers);
+        # a session passed in is shared with other clients and left open by close()
+        self._owns_session = session is None
+        self._session = session or requests.Session()
+        
+        # arXiv asks clients to avoid redundant traffic; paper metadata rarely
+        # changes, so identical query URLs are answered from disk for cache_ttl
+        # seconds (0 disables the cache)
+        self._cache = DiskCache("arxiv") if cache_ttl else None
+        
+    def close(self):
+        """Close the underlying HTTP session unless it was passed in."""
+        if self._owns_session:
+            self._session.close()
+    
+    def warmup(self):
+        """Open a pooled connection to the API ahead of the first search.
+        
+        Failures are ignored; the first search then connects as usual.
+        """
+        try:
+            self.ping(self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"ArXiv connection warm-up failed: {str(e)}")
+    
+    def ping(self, timeout=3):
+        """Check that the API is reachable with a HEAD request.
+        
+        Returns:
+            True unless the server answers with a 5xx status; connection
+            errors raise requests.exceptions.RequestException
+        """
+        response = self._session.head(self.base_url, timeout=timeout)
+        response.close()
+        return response.status_code < 500
+        
+    def search_many(self, queries, max_results=10, sort_by="relevance", timeout=None):
+        """Search ArXiv for several queries concurrently.
+        
+        Args:
+            queries: Iterable of query strings
+            max_results: Maximum number of results per query
+            sort_by: Sort order passed to each search
+            timeout: Custom timeout for each request (overrides default)
+            
+        Returns:
+            List of search results in the same order as queries
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        
+        # Network latency dominates, so overlap the requests on a bounded pool
+        workers = min(self.max_workers, len(queries))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda q: self.search(q, max_results=max_results, sort_by=sort_by, timeout=timeout),
+                queries
+            ))
+        
     def search(self, query, max_results=10, sort_by="relevance", timeout=None):
         """Search ArXiv for papers."""
         timeout = timeout or self.timeout
@@ -28,68 +232,55 @@ class Arxiv:
         logger.info(f"Searching arXiv for: {query}")
         
         # 如果查询是中文，生成附加的英文查询版本
-        is_chinese = any('\u4e00' <= char <= '\u9fff' for char in query)
-        if is_chinese:
+        if _CJK_RE.search(query):
             logger.info("Detected Chinese query, attempting to enhance search...")
             
-            # 尝试使用一些相关关键词扩展
-            # 对于医学领域的查询，添加一些特定的英文术语
-            medical_keywords = ["medicine", "medical", "health", "clinical", "treatment", "diagnosis",
-                               "orthopedics", "orthopedic", "bone", "joint", "surgery", "trauma"]
-            ai_keywords = ["artificial intelligence", "machine learning", "deep learning", "neural network",
-                          "large language model", "LLM", "transformer", "AI", "algorithm"]
-            
-            # 将原始查询与相关英文关键词组合
-            combined_query = query
-            
-            # 检查是否包含"骨科"相关关键词
-            if "骨科" in query:
-                combined_query = f"(orthopedics OR orthopedic) OR ((bone OR joint) AND (AI OR model))"
-                logger.info(f"Enhanced orthopedic query: {combined_query}")
-                
-            # 检查是否包含"大模型"相关关键词
-            elif "大模型" in query or "模型" in query:
-                combined_query = f"(large language model OR LLM OR deep learning model OR AI model OR large model)"
-                logger.info(f"Enhanced model query: {combined_query}")
-                
-            # 检查是否包含"麻醉"相关关键词
-            elif "麻醉" in query:
-                combined_query = f"(anesthesia OR anesthetic OR anesthesiology) AND (AI OR model OR machine learning)"
-                logger.info(f"Enhanced anesthesia query: {combined_query}")
-                
-            # 其他中文查询的通用处理
+            # 按优先级检查领域关键词 (骨科 > 模型 > 麻醉)
+            enhanced = next((q for keyword, q in _ENHANCED_QUERIES.items() if keyword in query), None)
+            if enhanced:
+                query = enhanced
+                logger.info(f"Enhanced query: {query}")
             else:
-                # 创建一个基本的英文版本 (实际应用中可以接入翻译API)
-                basic_english = query.replace("大模型", "large model").replace("骨科", "orthopedics").replace("麻醉", "anesthesia")
-                combined_query = f"({basic_english})"
-                logger.info(f"Added basic English translation: {combined_query}")
-                
-            # 使用增强的查询
-            query = combined_query
+                # 其他中文查询的通用处理 (实际应用中可以接入翻译API)
+                query = f"({query})"
+                logger.info(f"Using Chinese query as-is: {query}")
         
         # Convert sort parameter to ArXiv format
-        sort_map = {
-            "relevance": "relevance",
-            "lastUpdatedDate": "lastUpdatedDate",
-            "submittedDate": "submittedDate"
-        }
-        sort_param = sort_map.get(sort_by, "relevance")
-        
-        # Prepare the query
-        encoded_query = quote(query)
+        params = {"start": 0, "max_results": max_results, "sortBy": _SORT_PARAMS.get(sort_by, "relevance")}
         
         # Construct URL
-        url = f"{self.base_url}?search_query=all:{encoded_query}&start=0&max_results={max_results}&sortBy={sort_param}"
+        url = self._build_url(query, params)
         logger.info(f"ArXiv API URL: {url}")
         
+        cache_key = make_key(url)
+        if self._cache:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Returning cached arXiv results for: {query}")
+                return {**cached, 'papers': [Paper.from_dict(p) for p in cached['papers']]}
+        
+        return self._inflight.do(
+            cache_key,
+            lambda: self._fetch(query, url, cache_key, params, timeout)
+        )
+    
+    def _build_url(self, query, params):
+        """Return the API URL for query with every parameter quoted uniformly."""
+        return f"{self.base_url}?{urlencode({'search_query': f'all:{query}', **params}, quote_via=quote_plus)}"
+    
+    def _fetch(self, query, url, cache_key, params, timeout):
+        """Request and parse the feed for url, retrying on transient failures."""
         # Enhanced error handling with retries
         for attempt in range(self.max_retries):
             try:
                 logger.info(f"ArXiv API request attempt {attempt+1}/{self.max_retries}")
-                response = requests.get(url, timeout=timeout)
+                # Stream the body so entries are parsed while the feed is still downloading
+                response = self._session.get(url, timeout=timeout, stream=True)
                 
                 if response.status_code == 200:
-                    results = self._parse_arxiv_response(response.text)
+                    with response:
+                        response.raw.decode_content = True
+                        results = self._parse_arxiv_response(response.raw)
                     logger.info(f"Found {len(results['papers'])} papers on arXiv")
                     
                     # If no papers found but we have retries left, try again with a different query
@@ -99,39 +290,49 @@ class Arxiv:
                         # Simplify the query if needed
                         if " AND " in query:
                             query = query.split(" AND ")[0]
-                            encoded_query = quote(query)
-                            url = f"{self.base_url}?search_query=all:{encoded_query}&start=0&max_results={max_results}&sortBy={sort_param}"
+                            url = self._build_url(query, params)
                             logger.info(f"Simplified query for next attempt: {query}")
-                            time.sleep(self.base_delay * (attempt + 1))  # Exponential backoff
+                            time.sleep(self._backoff(attempt))
                             continue
                     
+                    # Errors and empty feeds are retried on the next search instead
+                    if self._cache and results['papers'] and 'error' not in results:
+                        self._cache.set(
+                            cache_key,
+                            {**results, 'papers': [p.to_dict() for p in results['papers']]},
+                            expire=self.cache_ttl
+                        )
                     return results
-                elif response.status_code == 429:
+                
+                # Error bodies are never read; release the connection back to the pool
+                response.close()
+                if not is_retryable_status(response.status_code):
+                    # Other client errors fail the same way on every attempt
+                    logger.error(f"ArXiv API error: {response.status_code}")
+                    break
+                
+                if response.status_code == 429:
                     # Rate limited
                     logger.warning(f"ArXiv rate limit reached (attempt {attempt+1})")
-                    wait_time = self.base_delay * (2 ** attempt)  # Exponential backoff
-                    logger.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
-                elif response.status_code >= 500:
+                else:
                     # Server error
                     logger.warning(f"ArXiv server error {response.status_code} (attempt {attempt+1})")
-                    wait_time = self.base_delay * (2 ** attempt)  # Exponential backoff
-                    logger.info(f"Waiting {wait_time} seconds before retry")
+                if attempt < self.max_retries - 1:
+                    wait_time = self._backoff(attempt, response)
+                    logger.info(f"Waiting {wait_time:.1f} seconds before retry")
                     time.sleep(wait_time)
-                else:
-                    # Other error
-                    logger.error(f"ArXiv API error: {response.status_code}")
-                    break
             except requests.exceptions.Timeout:
                 logger.warning(f"ArXiv API timeout (attempt {attempt+1})")
-                wait_time = self.base_delay * (2 ** attempt)  # Exponential backoff
-                logger.info(f"Waiting {wait_time} seconds before retry")
-                time.sleep(wait_time)
-            except requests.exceptions.RequestException as e:
+                if attempt < self.max_retries - 1:
+                    wait_time = self._backoff(attempt)
+                    logger.info(f"Waiting {wait_time:.1f} seconds before retry")
+                    time.sleep(wait_time)
+            except _TRANSPORT_ERRORS as e:
                 logger.error(f"ArXiv API request error: {str(e)} (attempt {attempt+1})")
-                wait_time = self.base_delay * (2 ** attempt)  # Exponential backoff
-                logger.info(f"Waiting {wait_time} seconds before retry")
-                time.sleep(wait_time)
+                if attempt < self.max_retries - 1:
+                    wait_time = self._backoff(attempt)
+                    logger.info(f"Waiting {wait_time:.1f} seconds before retry")
+                    time.sleep(wait_time)
             except Exception as e:
                 logger.error(f"Unexpected error in ArXiv API request: {str(e)} (attempt {attempt+1})")
                 break
@@ -145,97 +346,53 @@ class Arxiv:
             'error': f"ArXiv API failed after {self.max_retries} attempts"
         }
                     
-    def _parse_arxiv_response(self, content):
-        """Parse the XML response from ArXiv."""
+    def _backoff(self, attempt, response=None):
+        """Return the delay before retrying after a failed attempt.
+        
+        A Retry-After header on the response takes precedence over the
+        jittered exponential backoff.
+        """
+        if response is not None:
+            delay = retry_after(response, self.max_delay)
+            if delay is not None:
+                return delay
+        return exponential_delay(self.base_delay, attempt, self.max_delay, self.jitter)
+    
+    def _parse_arxiv_response(self, stream):
+        """Parse the XML response from ArXiv.
+        
+        Entries are parsed incrementally and cleared once extracted, so
+        memory stays bounded by a single entry rather than the whole feed.
+        
+        Args:
+            stream: File-like object yielding the feed bytes (e.g. a raw
+                streamed response), or the feed as str/bytes
+        """
+        if isinstance(stream, str):
+            stream = stream.encode('utf-8')
+        if isinstance(stream, bytes):
+            stream = BytesIO(stream)
+        
         try:
-            root = ET.fromstring(content)
-            
-            # Extract namespace
-            ns = {'atom': 'http://www.w3.org/2005/Atom',
-                'arxiv': 'http://arxiv.org/schemas/atom'}
-            
             papers = []
-            for entry in root.findall('./atom:entry', ns):
-                try:
-                    # Get basic metadata
-                    title = entry.find('./atom:title', ns)
-                    title_text = title.text.strip() if title is not None and title.text else "Untitled"
-                    
-                    summary = entry.find('./atom:summary', ns)
-                    summary_text = summary.text.strip() if summary is not None and summary.text else "No summary available"
-                    
-                    published = entry.find('./atom:published', ns)
-                    published_text = published.text if published is not None and published.text else None
-                    
-                    updated = entry.find('./atom:updated', ns)
-                    updated_text = updated.text if updated is not None and updated.text else None
-                    
-                    # Get authors
-                    authors = []
-                    for author in entry.findall('./atom:author/atom:name', ns):
-                        if author.text:
-                            authors.append(author.text)
-                    
-                    # Get links and ID
-                    links = {}
-                    for link in entry.findall('./atom:link', ns):
-                        link_title = link.get('title', '')
-                        link_href = link.get('href', '')
-                        link_type = link.get('type', '')
-                        
-                        if link_title == 'pdf':
-                            links['pdf'] = link_href
-                        elif link_type == 'text/html':
-                            links['html'] = link_href
-                    
-                    paper_id_elem = entry.find('./atom:id', ns)
-                    paper_id = "unknown"
-                    if paper_id_elem is not None and paper_id_elem.text:
-                        paper_id = paper_id_elem.text
-                        if '/' in paper_id:
-                            paper_id = paper_id.split('/')[-1]
-                            if 'v' in paper_id:
-                                paper_id = paper_id.split('v')[0]
-                    
-                    # Get categories/topics
-                    categories = []
-                    for category in entry.findall('./atom:category', ns):
-                        cat_term = category.get('term')
-                        if cat_term:
-                            categories.append(cat_term)
-                    
-                    # Get DOI if available
-                    doi = None
-                    for link in entry.findall('./atom:link', ns):
-                        if link.get('title') == 'doi':
-                            doi = link.get('href')
-                    
-                    # 格式化为更友好的对象
-                    paper = {
-                        'paper_id': paper_id,
-                        'title': title_text,
-                        'summary': summary_text,
-                        'authors': authors,
-                        'published': published_text[:10] if published_text else None,  # 只保留日期部分
-                        'updated': updated_text[:10] if updated_text else None,  # 只保留日期部分
-                        'url': links.get('html') or f"https://arxiv.org/abs/{paper_id}",  # 确保总是有URL
-                        'pdf_url': links.get('pdf'),
-                        'categories': categories,
-                        'doi': doi,
-                        'source': 'arxiv'
-                    }
-                    papers.append(paper)
-                except Exception as e:
-                    logger.error(f"Error parsing paper entry: {str(e)}")
-                    continue
+            for _, entry in ET.iterparse(stream, events=('end',)):
+                if entry.tag == ENTRY_TAG:
+                    papers.append(_parse_entry(entry))
+                    entry.clear()
+                    # lxml keeps cleared siblings attached to the root; drop them too
+                    if hasattr(entry, 'getprevious'):
+                        while entry.getprevious() is not None:
+                            del entry.getparent()[0]
             
             return {
                 'papers': papers,
                 'total_results': len(papers)
             }
+        except _TRANSPORT_ERRORS:
+            # A broken download is a failed attempt for _fetch to retry, not a bad feed
+            raise
         except ET.ParseError as e:
             logger.error(f"XML parse error: {str(e)}")
-            logger.error(f"Content: {content[:100]}...")  # Log the first 100 chars
             return {
                 'papers': [],
                 'total_results': 0,
@@ -247,4 +404,4 @@ class Arxiv:
                 'papers': [],
                 'total_results': 0,
                 'error': f"Error parsing response: {str(e)}"
-            } 
\ No newline at end of file
+            } 
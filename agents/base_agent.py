@@ -2,9 +2,16 @@ import os
 import json
 import logging
 import requests
+import threading
+from types import SimpleNamespace
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, APITimeoutError
 import sys
 import time
 from pathlib import Path
@@ -15,6 +22,9 @@ parent_dir = current_dir.parent
 sys.path.append(str(parent_dir))
 
 import config
+from .retry import capped_delay, is_retryable_status, NON_RETRYABLE_STATUS
+from . import json_utils
+from .search_cache import DiskCache, SearchResultCache, make_key
 
 # Load .env file if it exists
 load_dotenv()
@@ -23,9 +33,201 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# model_type -> (model env var, default model, API key env var, endpoint)
+_MODEL_CONFIGS = {
+    "siliconflow": ("DEFAULT_MODEL", "deepseek-ai/DeepSeek-R1-Distill-Qwen-7B", "SILICONFLOW_API_KEY",
+                    "https://api.siliconflow.cn/v1/chat/completions"),
+    "openai": ("OPENAI_MODEL", "gpt-4o", "OPENAI_API_KEY",
+               "https://api.openai.com/v1/chat/completions"),
+    "anthropic": ("ANTHROPIC_MODEL", "claude-3-opus-20240229", "ANTHROPIC_API_KEY",
+                  "https://api.anthropic.com/v1/messages"),
+    "gemini": ("GEMINI_MODEL", "gemini-1.5-pro", "GEMINI_API_KEY",
+               "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-pro:generateContent"),
+    "glm": ("GLM_MODEL", "glm-4", "GLM_API_KEY",
+            "https://open.bigmodel.cn/api/paas/v4/chat/completions"),
+    "qwen": ("QWEN_MODEL", "qwen-max", "QWEN_API_KEY",
+             "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"),
+    "zhipu": ("ZHIPU_MODEL", "glm-4", "ZHIPU_API_KEY",
+              "https://open.bigmodel.cn/api/paas/v4/chat/completions"),
+    "baidu": ("BAIDU_MODEL", "ernie-4.0", "BAIDU_API_KEY",
+              "https://aip.baidubce.com/rpc/2.0/ai_custom/v1/wenxinworkshop/chat/completions"),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class _EnvConfig:
+    """Agent settings read from the environment once at import time."""
+    default_temperature: float
+    max_tokens: int
+    timeout: int
+    max_retries: int
+    base_delay: float
+    keys: dict
+    models: dict
+
+
+def _load_env():
+    return _EnvConfig(
+        default_temperature=float(os.getenv("DEFAULT_TEMPERATURE", 0.7)),
+        max_tokens=int(os.getenv("MAX_TOKENS", config.MAX_TOKENS)),
+        timeout=config.REQUEST_TIMEOUT,
+        max_retries=config.MAX_RETRIES,
+        base_delay=config.BASE_DELAY,
+        keys={model_type: os.getenv(env_key, "") for model_type, (_, _, env_key, _) in _MODEL_CONFIGS.items()},
+        models={model_type: os.getenv(env_model, default) for model_type, (env_model, default, _, _) in _MODEL_CONFIGS.items()},
+    )
+
+
+_ENV = _load_env()
+
+
+def _resolve_model_config(model_type):
+    """Return (model, api_key, api_url) for model_type, falling back to siliconflow."""
+    if model_type not in _MODEL_CONFIGS:
+        model_type = "siliconflow"
+    return _ENV.models[model_type], _ENV.keys[model_type], _MODEL_CONFIGS[model_type][3]
+
+
+def _split_system(messages):
+    """Split chat messages into the system prompt and the user/assistant turns."""
+    system_message = ""
+    conversation = []
+    for msg in messages:
+        if msg["role"] == "system":
+            system_message = msg["content"]
+        elif msg["role"] in ("user", "assistant"):
+            conversation.append(msg)
+    return system_message, conversation
+
+
+def _bearer_headers(api_key):
+    return {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+
+
+def _anthropic_headers(api_key):
+    return {"Content-Type": "application/json", "x-api-key": api_key, "anthropic-version": "2023-06-01"}
+
+
+def _build_openai_compatible(endpoint, agent, messages):
+    # OpenAI兼容格式 (适用于SiliconFlow、GLM等)
+    return {
+        "model": endpoint.model,
+        "messages": messages,
+        "temperature": agent.temperature,
+        "max_tokens": agent.max_tokens
+    }
+
+
+def _build_anthropic(endpoint, agent, messages):
+    # Claude API格式
+    system_message, conversation = _split_system(messages)
+    return {
+        "model": endpoint.model,
+        "messages": conversation,
+        "system": system_message,
+        "max_tokens": agent.max_tokens,
+        "temperature": agent.temperature
+    }
+
+
+def _build_gemini(endpoint, agent, messages):
+    # Google Gemini API格式; system消息在Gemini中会加入到第一个用户消息中
+    roles = {"user": "user", "assistant": "model"}
+    return {
+        "contents": [
+            {"role": roles[msg["role"]], "parts": [{"text": msg["content"]}]}
+            for msg in messages if msg["role"] in roles
+        ],
+        "generationConfig": {
+            "temperature": agent.temperature,
+            "maxOutputTokens": agent.max_tokens,
+        }
+    }
+
+
+def _parse_openai_compatible(result):
+    if result.get("choices"):
+        return result["choices"][0]["message"]["content"].strip()
+    return None
+
+
+def _parse_anthropic(result):
+    if result.get("content"):
+        return result["content"][0]["text"]
+    return None
+
+
+def _parse_gemini(result):
+    if result.get("candidates"):
+        return result["candidates"][0]["content"]["parts"][0]["text"]
+    return None
+
+
+# model_type -> (headers factory, payload builder, response parser) for HTTP-based APIs
+_REQUEST_FORMATS = {
+    "anthropic": (_anthropic_headers, _build_anthropic, _parse_anthropic),
+    "gemini": (_bearer_headers, _build_gemini, _parse_gemini),
+}
+_DEFAULT_REQUEST_FORMAT = (_bearer_headers, _build_openai_compatible, _parse_openai_compatible)
+
+# Fully resolved target of an API call; the agent's primary endpoint and its
+# fallback are independent values so both can be in flight at once
+_Endpoint = namedtuple("_Endpoint", "model_type model api_key api_url headers build_payload parse_response")
+
+# Start the fallback request once the primary has used this share of its timeout
+HEDGE_FRACTION = 0.75
+
+# How long _cached_api_call keeps a completion, in seconds
+LLM_CACHE_TTL = 7 * 86400
+
+# test_connection sends one tiny request and gives up quickly instead of retrying
+PROBE_TIMEOUT = 10
+PROBE_MAX_TOKENS = 16
+
+
+def _make_endpoint(model_type, model, api_key, api_url):
+    make_headers, build_payload, parse_response = _REQUEST_FORMATS.get(model_type, _DEFAULT_REQUEST_FORMAT)
+    return _Endpoint(model_type, model, api_key, api_url, make_headers(api_key), build_payload, parse_response)
+
+
+class _APICallFailed(Exception):
+    """Raised when every attempt against an endpoint failed; str() is the user-facing message.
+    
+    transient is False when another endpoint would fail the same way, such as
+    for a rejected request; only transient failures are worth a fallback.
+    """
+    
+    def __init__(self, message, transient=True):
+        super().__init__(message)
+        self.transient = transient
+
+
+def _transient_status(status_code):
+    """Return True if a failure with this HTTP status (None for no response) may pass elsewhere."""
+    return status_code is None or is_retryable_status(status_code)
+
+
+def _sleep_before_retry(wait_time, cancelled):
+    """Sleep before the next attempt; give up early once the cancelled event is set."""
+    if cancelled is None:
+        time.sleep(wait_time)
+    elif cancelled.wait(wait_time):
+        raise _APICallFailed("API调用已取消", transient=False)
+
 class BaseAgent(ABC):
     """Base class for all agents in the system."""
     
+    # Keep-alive HTTP sessions shared by all agents, keyed by API host
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+    
+    # Worker threads for hedged calls, shared by all agents
+    _hedge_executor = None
+    
+    # Completions of identical prompts, shared by all agents: in memory, then on disk
+    _llm_cache = SearchResultCache(maxsize=1024, ttl=LLM_CACHE_TTL)
+    _llm_disk_cache = DiskCache("llm")
+    
     def __init__(self, model_type="siliconflow", custom_model_config=None):
         """Initialize the agent with configuration settings.
         
@@ -37,40 +239,13 @@ class BaseAgent(ABC):
         self.model_type = model_type.lower()
         self.custom_model_config = custom_model_config
         
+        # 通用配置 (自定义模型可覆盖)
+        self.temperature = _ENV.default_temperature
+        self.max_tokens = _ENV.max_tokens
+        self.timeout = _ENV.timeout
+        
         # Set API configurations based on model type
-        if self.model_type == "siliconflow":
-            self.model = os.getenv("DEFAULT_MODEL", "deepseek-ai/DeepSeek-R1-Distill-Qwen-7B")
-            self.api_key = os.getenv("SILICONFLOW_API_KEY", "")
-            self.api_url = "https://api.siliconflow.cn/v1/chat/completions"
-        elif self.model_type == "openai":
-            self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
-            self.api_key = os.getenv("OPENAI_API_KEY", "")
-            self.api_url = "https://api.openai.com/v1/chat/completions"
-        elif self.model_type == "anthropic":
-            self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")
-            self.api_key = os.getenv("ANTHROPIC_API_KEY", "")
-            self.api_url = "https://api.anthropic.com/v1/messages"
-        elif self.model_type == "gemini":
-            self.model = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
-            self.api_key = os.getenv("GEMINI_API_KEY", "")
-            self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-pro:generateContent"
-        elif self.model_type == "glm":
-            self.model = os.getenv("GLM_MODEL", "glm-4")
-            self.api_key = os.getenv("GLM_API_KEY", "")
-            self.api_url = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
-        elif self.model_type == "qwen":
-            self.model = os.getenv("QWEN_MODEL", "qwen-max")
-            self.api_key = os.getenv("QWEN_API_KEY", "")
-            self.api_url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
-        elif self.model_type == "zhipu":
-            self.model = os.getenv("ZHIPU_MODEL", "glm-4")
-            self.api_key = os.getenv("ZHIPU_API_KEY", "")
-            self.api_url = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
-        elif self.model_type == "baidu":
-            self.model = os.getenv("BAIDU_MODEL", "ernie-4.0")
-            self.api_key = os.getenv("BAIDU_API_KEY", "")
-            self.api_url = "https://aip.baidubce.com/rpc/2.0/ai_custom/v1/wenxinworkshop/chat/completions"
-        elif self.model_type == "custom" and custom_model_config:
+        if self.model_type == "custom" and custom_model_config:
             # 设置自定义模型配置
             self.model = custom_model_config.get("model_name", "custom-model")
             self.api_key = custom_model_config.get("api_key", "")
@@ -78,83 +253,127 @@ class BaseAgent(ABC):
             self.temperature = float(custom_model_config.get("temperature", 0.7))
             self.max_tokens = int(custom_model_config.get("max_tokens", 2000))
         else:
-            # 默认使用siliconflow
-            self.model = os.getenv("DEFAULT_MODEL", "deepseek-ai/DeepSeek-R1-Distill-Qwen-7B")
-            self.api_key = os.getenv("SILICONFLOW_API_KEY", "")
-            self.api_url = "https://api.siliconflow.cn/v1/chat/completions"
+            # 未知类型默认使用siliconflow
+            self.model, self.api_key, self.api_url = _resolve_model_config(self.model_type)
         
-        # 通用配置
-        if not hasattr(self, 'temperature'):
-            self.temperature = float(os.getenv("DEFAULT_TEMPERATURE", 0.7))
-        if not hasattr(self, 'max_tokens'):
-            self.max_tokens = int(os.getenv("MAX_TOKENS", config.MAX_TOKENS))
-        self.timeout = config.REQUEST_TIMEOUT  # Use timeout from config
+        self._openai_client = None
+        self._resolve_request_format()
         
         logger.info(f"Initialized {self.__class__.__name__} with model type {self.model_type}, model {self.model}")
 
+    @classmethod
+    def _get_session(cls, url):
+        """Return the pooled HTTP session for the host of the given URL."""
+        host = urlparse(url).netloc
+        session = cls._sessions.get(host)
+        if session is None:
+            with cls._sessions_lock:
+                session = cls._sessions.get(host)
+                if session is None:
+                    session = requests.Session()
+                    # Retries are handled by _make_api_call, not by urllib3
+                    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    cls._sessions[host] = session
+        return session
+
+    @classmethod
+    def _get_hedge_executor(cls):
+        """Return the thread pool used to run primary and fallback calls side by side."""
+        if cls._hedge_executor is None:
+            with cls._sessions_lock:
+                if cls._hedge_executor is None:
+                    cls._hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+        return cls._hedge_executor
+
+    def _resolve_request_format(self):
+        """Precompute the endpoint (headers, payload builder, response parser) for the current model."""
+        self._endpoint = _make_endpoint(self.model_type, self.model, self.api_key, self.api_url)
+        self._fallback = None
+        if self.model_type == "openai":
+            model, api_key, api_url = _resolve_model_config("siliconflow")
+            if api_key:
+                self._fallback = _make_endpoint("siliconflow", model, api_key, api_url)
+
+    def _get_openai_client(self):
+        """Return the OpenAI client, creating it on first use."""
+        if self._openai_client is None:
+            # Retries and timeouts are handled by _call_endpoint, not by the SDK
+            self._openai_client = OpenAI(api_key=self.api_key, timeout=self.timeout, max_retries=0)
+        return self._openai_client
+
     def _make_api_call(self, messages):
-        """Make an API call to the AI model with retry mechanism."""
+        """Make an API call to the AI model with retry mechanism.
+        
+        When a fallback model is configured (SiliconFlow for OpenAI agents) the
+        call is hedged: if the primary has not answered within HEDGE_FRACTION of
+        the timeout, or has failed with a timeout, 429 or 5xx, the fallback is
+        started and the first successful answer wins.
+        """
         logger.info(f"Making API call to {self.model_type} with {len(messages)} messages")
         
-        max_retries = config.MAX_RETRIES
-        base_delay = config.BASE_DELAY
+        try:
+            if self._fallback is None:
+                return self._call_endpoint(self._endpoint, messages)
+            return self._hedged_call(self._endpoint, self._fallback, messages)
+        except _APICallFailed as e:
+            self.progress = 0
+            return str(e)
+
+    def _hedged_call(self, primary, fallback, messages):
+        """Race the primary endpoint against a delayed fallback; return the first success."""
+        executor = self._get_hedge_executor()
+        cancelled = threading.Event()
+        pending = {executor.submit(self._call_endpoint, primary, messages, cancelled)}
+        try:
+            done, pending = wait(pending, timeout=self.timeout * HEDGE_FRACTION)
+            if done:
+                try:
+                    return done.pop().result()
+                except _APICallFailed as e:
+                    # A rejected request would be rejected by the fallback as well
+                    if not e.transient:
+                        raise
+                    logger.info(f"{primary.model_type} call failed, falling back to {fallback.model_type}")
+            else:
+                logger.info(f"{primary.model_type} call still pending, hedging with {fallback.model_type}")
+            
+            pending.add(executor.submit(self._call_endpoint, fallback, messages, cancelled))
+            error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        return future.result()
+                    except _APICallFailed as e:
+                        error = e
+            raise error
+        finally:
+            # The losing call gives up at its next retry instead of holding a pool
+            # worker through all of them; its in-flight request ends at the timeout
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+
+    def _call_endpoint(self, endpoint, messages, cancelled=None):
+        """Call a single endpoint with retries; raise _APICallFailed when all attempts fail.
+        
+        Setting the optional cancelled event stops the retries early.
+        """
+        max_retries = _ENV.max_retries
+        base_delay = _ENV.base_delay
+        
+        # The request body is identical for every attempt, so build it once
+        if endpoint.model_type != "openai":
+            body = json_utils.dumps_bytes(endpoint.build_payload(endpoint, self, messages))
         
         for retry_count in range(max_retries):
             try:
-                # 基础头部
-                headers = {
-                    "Content-Type": "application/json"
-                }
-                
-                # 根据不同API类型设置不同的请求格式
-                if self.model_type == "anthropic":
-                    # Claude API格式
-                    headers["x-api-key"] = self.api_key
-                    headers["anthropic-version"] = "2023-06-01"
-                    
-                    # 转换消息格式
-                    system_message = ""
-                    conversation = []
-                    
-                    for msg in messages:
-                        if msg["role"] == "system":
-                            system_message = msg["content"]
-                        elif msg["role"] in ["user", "assistant"]:
-                            conversation.append(msg)
-                    
-                    data = {
-                        "model": self.model,
-                        "messages": conversation,
-                        "system": system_message,
-                        "max_tokens": self.max_tokens,
-                        "temperature": self.temperature
-                    }
-                elif self.model_type == "gemini":
-                    # Google Gemini API格式
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-                    
-                    # 转换消息格式为Gemini格式
-                    gemini_messages = []
-                    for msg in messages:
-                        if msg["role"] == "user":
-                            gemini_messages.append({"role": "user", "parts": [{"text": msg["content"]}]})
-                        elif msg["role"] == "assistant":
-                            gemini_messages.append({"role": "model", "parts": [{"text": msg["content"]}]})
-                        # system消息在Gemini中会加入到第一个用户消息中
-                    
-                    data = {
-                        "contents": gemini_messages,
-                        "generationConfig": {
-                            "temperature": self.temperature,
-                            "maxOutputTokens": self.max_tokens,
-                        }
-                    }
-                elif self.model_type == "openai":
+                if endpoint.model_type == "openai":
                     # Use the OpenAI client instead of direct API call for OpenAI
-                    client = OpenAI(api_key=self.api_key)
-                    
-                    response = client.chat.completions.create(
-                        model=self.model,
+                    response = self._get_openai_client().chat.completions.create(
+                        model=endpoint.model,
                         messages=messages,
                         temperature=self.temperature,
                         max_tokens=self.max_tokens
@@ -162,140 +381,139 @@ class BaseAgent(ABC):
                     
                     # Return the response directly
                     return response.choices[0].message.content.strip()
-                else:
-                    # OpenAI兼容格式 (适用于SiliconFlow、GLM等)
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-                    
-                    data = {
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": self.temperature,
-                        "max_tokens": self.max_tokens
-                    }
                 
                 # 发送请求
-                response = requests.post(
-                    self.api_url,
-                    headers=headers,
-                    json=data,
+                response = self._get_session(endpoint.api_url).post(
+                    endpoint.api_url,
+                    headers=endpoint.headers,
+                    data=body,
                     timeout=self.timeout
                 )
                 
                 # 处理响应
                 if response.status_code == 200:
-                    result = response.json()
-                    
-                    # 根据不同API类型解析响应
-                    if self.model_type == "anthropic":
-                        if "content" in result and result["content"]:
-                            content = result["content"][0]["text"]
-                            self.progress = 100
-                            return content
-                    elif self.model_type == "gemini":
-                        if "candidates" in result and result["candidates"]:
-                            content = result["candidates"][0]["content"]["parts"][0]["text"]
-                            self.progress = 100
-                            return content
-                    else:
-                        # OpenAI兼容格式
-                        if "choices" in result and len(result["choices"]) > 0:
-                            self.progress = 100
-                            return result["choices"][0]["message"]["content"].strip()
+                    # Parse the raw bytes directly instead of decoding to str first
+                    content = endpoint.parse_response(json_utils.loads(response.content))
+                    if content is not None:
+                        self.progress = 100
+                        return content
                 
                 # 处理错误响应
-                error_msg = f"API error ({self.model_type}): {response.status_code} - {response.text}"
-                logger.error(error_msg)
+                logger.error("API error (%s): %s - %s", endpoint.model_type, response.status_code,
+                             response.content[:512].decode("utf-8", "replace"))
+                
+                # Client errors such as a bad key or unknown model won't fix themselves
+                if response.status_code in NON_RETRYABLE_STATUS:
+                    raise _APICallFailed(f"API调用失败，状态码: {response.status_code}", transient=False)
                 
                 # If we're not on the last retry, wait and try again
                 if retry_count < max_retries - 1:
-                    wait_time = base_delay * (retry_count + 1)  # Exponential backoff
-                    logger.info(f"Retrying in {wait_time} seconds... (Attempt {retry_count + 1}/{max_retries})")
-                    time.sleep(wait_time)
+                    wait_time = capped_delay(base_delay, retry_count)
+                    logger.info(f"Retrying in {wait_time:.1f} seconds... (Attempt {retry_count + 1}/{max_retries})")
+                    _sleep_before_retry(wait_time, cancelled)
                     continue
                 else:
                     # Last retry failed
-                    self.progress = 0
-                    return f"API调用失败，状态码: {response.status_code}"
+                    raise _APICallFailed(f"API调用失败，状态码: {response.status_code}",
+                                         transient=_transient_status(response.status_code))
+            
+            except _APICallFailed:
+                raise
             
-            except requests.exceptions.Timeout:
+            except (requests.exceptions.Timeout, APITimeoutError):
                 # Handle timeout specifically
-                error_msg = f"API timeout ({self.model_type}): Connection timed out"
-                logger.error(error_msg)
-                
-                # Fall back to local/alternative model if available
-                if self.model_type == "openai" and "siliconflow" != self.model_type:
-                    logger.info("Falling back to SiliconFlow model due to OpenAI timeout")
-                    # Save original settings
-                    orig_model_type = self.model_type
-                    orig_model = self.model
-                    orig_api_key = self.api_key
-                    orig_api_url = self.api_url
-                    
-                    # Temporarily switch to SiliconFlow
-                    self.model_type = "siliconflow"
-                    self.model = os.getenv("DEFAULT_MODEL", "deepseek-ai/DeepSeek-R1-Distill-Qwen-7B")
-                    self.api_key = os.getenv("SILICONFLOW_API_KEY", "")
-                    self.api_url = "https://api.siliconflow.cn/v1/chat/completions"
-                    
-                    # Make the call
-                    try:
-                        result = self._make_api_call(messages)
-                        # If successful, return the result
-                        return result
-                    except Exception:
-                        # If fallback fails, restore original settings
-                        pass
-                    finally:
-                        # Restore original settings
-                        self.model_type = orig_model_type
-                        self.model = orig_model
-                        self.api_key = orig_api_key
-                        self.api_url = orig_api_url
+                logger.error(f"API timeout ({endpoint.model_type}): Connection timed out")
                 
                 # If we're not on the last retry, wait and try again
                 if retry_count < max_retries - 1:
-                    wait_time = base_delay * (retry_count + 1)  # Exponential backoff
-                    logger.info(f"Retrying in {wait_time} seconds... (Attempt {retry_count + 1}/{max_retries})")
-                    time.sleep(wait_time)
+                    wait_time = capped_delay(base_delay, retry_count)
+                    logger.info(f"Retrying in {wait_time:.1f} seconds... (Attempt {retry_count + 1}/{max_retries})")
+                    _sleep_before_retry(wait_time, cancelled)
                     continue
                 else:
                     # Last retry failed
-                    self.progress = 0
-                    return "API连接超时，请检查网络连接或使用其他模型"
+                    raise _APICallFailed("API连接超时，请检查网络连接或使用其他模型")
             
             except Exception as e:
                 # Handle other exceptions
-                error_msg = f"API调用异常 ({self.model_type}): {str(e)}"
+                error_msg = f"API调用异常 ({endpoint.model_type}): {str(e)}"
                 logger.error(error_msg)
                 
+                # SDK errors such as openai.APIStatusError carry the HTTP status; a bad
+                # key or unknown model fails the same way on every retry
+                status_code = getattr(e, "status_code", None)
+                if status_code in NON_RETRYABLE_STATUS:
+                    raise _APICallFailed(f"API调用出错: {str(e)}", transient=False)
+                
                 # If we're not on the last retry, wait and try again
                 if retry_count < max_retries - 1:
-                    wait_time = base_delay * (retry_count + 1)  # Exponential backoff
-                    logger.info(f"Retrying in {wait_time} seconds... (Attempt {retry_count + 1}/{max_retries})")
-                    time.sleep(wait_time)
+                    wait_time = capped_delay(base_delay, retry_count)
+                    logger.info(f"Retrying in {wait_time:.1f} seconds... (Attempt {retry_count + 1}/{max_retries})")
+                    _sleep_before_retry(wait_time, cancelled)
                     continue
                 else:
                     # Last retry failed
-                    self.progress = 0
-                    return f"API调用出错: {str(e)}"
+                    raise _APICallFailed(f"API调用出错: {str(e)}", transient=_transient_status(status_code))
+    
+    def _cached_api_call(self, messages):
+        """Call the LLM, reusing the completion of an identical earlier prompt to the same model.
+        
+        Completions are kept for LLM_CACHE_TTL seconds. Failed calls are not
+        cached so that they are retried next time. Only use this for extraction
+        or summaries whose prompt contains all of their input; conversational
+        generation, which should vary between calls, goes through _make_api_call.
+        """
+        key = make_key(self.model_type, self.model, self.temperature, json_utils.dumps(messages))
+        cached = self._llm_cache.get(key)
+        if cached is None:
+            cached = self._llm_disk_cache.get(key)
+            if cached is not None:
+                self._llm_cache.set(key, cached)
+        if cached is not None:
+            return cached
+        
+        result = self._make_api_call(messages)
+        if result and not result.startswith("API"):
+            self._llm_cache.set(key, result)
+            self._llm_disk_cache.set(key, result, expire=LLM_CACHE_TTL)
+        return result
     
     def get_progress(self):
         """Get the current progress percentage of the agent's task."""
         return self.progress
     
+    def _probe(self, messages):
+        """Send a single short request to the primary endpoint, without retries or fallback."""
+        endpoint = self._endpoint
+        if endpoint.model_type == "openai":
+            response = self._get_openai_client().with_options(timeout=PROBE_TIMEOUT).chat.completions.create(
+                model=endpoint.model,
+                messages=messages,
+                max_tokens=PROBE_MAX_TOKENS
+            )
+            return (response.choices[0].message.content or "").strip()
+        
+        settings = SimpleNamespace(temperature=self.temperature, max_tokens=PROBE_MAX_TOKENS)
+        response = self._get_session(endpoint.api_url).post(
+            endpoint.api_url,
+            headers=endpoint.headers,
+            data=json_utils.dumps_bytes(endpoint.build_payload(endpoint, settings, messages)),
+            timeout=PROBE_TIMEOUT
+        )
+        if response.status_code != 200:
+            raise _APICallFailed(f"API调用失败，状态码: {response.status_code}")
+        return endpoint.parse_response(json_utils.loads(response.content)) or ""
+    
     def test_connection(self):
         """Test the connection to the model API."""
         logger.info(f"测试连接到 {self.model_type}")
         
         try:
             # 发送简单的测试消息
-            test_message = [{"role": "user", "content": "Hello"}]
-            result = self._make_api_call(test_message)
-            
-            if result and not result.startswith("API"):
-                return {"status": "success", "message": f"连接到{self.model_type}成功", "response": result}
-            else:
-                return {"status": "error", "message": result}
+            result = self._probe([{"role": "user", "content": "Hello"}])
+            return {"status": "success", "message": f"连接到{self.model_type}成功", "response": result}
+        except _APICallFailed as e:
+            return {"status": "error", "message": str(e)}
         except Exception as e:
             return {"status": "error", "message": f"连接测试失败: {str(e)}"}
     
@@ -1,13 +1,25 @@
 import os
-import json
 import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from .base_agent import BaseAgent
+from . import json_utils
+from .conversation_store import ConversationStore
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the application; this module only emits records
 logger = logging.getLogger(__name__)
 
+
+def _now_iso():
+    """Return the current local time as an ISO 8601 string."""
+    return datetime.now().isoformat()
+
+
+def _truncate(text, limit):
+    """Shorten text to at most limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
 class CommunicationAgent(BaseAgent):
     """Agent responsible for facilitating communication between other agents.
     
@@ -15,18 +27,30 @@ class CommunicationAgent(BaseAgent):
     between agents and enabling them to share information directly.
     """
 
-    def __init__(self, model_type="siliconflow", custom_model_config=None):
+    def __init__(self, model_type="siliconflow", custom_model_config=None, message_retention=None, db_path=None,
+                 max_history_per_conv=200):
         """Initialize the communication agent.
         
         Args:
             model_type: Type of model to use for text generation
             custom_model_config: Custom model configuration for custom model types
+            message_retention: Keep only this many most recent messages per
+                conversation (None keeps them all)
+            db_path: SQLite file that keeps agents and conversations across
+                restarts (None keeps them in memory for this agent's lifetime)
+            max_history_per_conv: Once a conversation holds more messages than
+                this, its oldest half is replaced by an LLM-written summary
+                (None disables compaction)
         """
         super().__init__(model_type=model_type, custom_model_config=custom_model_config)
+        self.message_retention = message_retention
+        self.max_history_per_conv = max_history_per_conv
+        self.prior_outcome_chars = 300  # Length of older round outcomes quoted in collaboration context
+        self.max_parallel_calls = 8  # Upper bound on concurrent LLM calls during collaboration
         self.name = "Communication Agent"
         self.description = "Facilitates communication between agents"
-        self.conversations = {}  # Stores conversation history between agents
-        self.agent_states = {}   # Tracks the current state of each agent
+        # Agent states and conversation history between agents
+        self.store = ConversationStore(db_path or ":memory:")
 
     def register_agent(self, agent_id, agent_type, description=None):
         """Register a new agent in the communication network.
@@ -39,17 +63,12 @@ class CommunicationAgent(BaseAgent):
         Returns:
             Boolean indicating success
         """
-        if agent_id not in self.agent_states:
-            self.agent_states[agent_id] = {
-                "type": agent_type,
-                "description": description or f"{agent_type.capitalize()} Agent",
-                "status": "idle",
-                "last_active": datetime.now().isoformat()
-            }
-            logger.info(f"Registered new agent: {agent_id} ({agent_type})")
+        description = description or f"{agent_type.capitalize()} Agent"
+        if self.store.add_agent(agent_id, agent_type, description, _now_iso()):
+            logger.info("Registered new agent: %s (%s)", agent_id, agent_type)
             return True
         else:
-            logger.warning(f"Agent {agent_id} already registered")
+            logger.warning("Agent %s already registered", agent_id)
             return False
 
     def send_message(self, sender_id, recipient_id, message, message_type="information"):
@@ -65,70 +84,68 @@ class CommunicationAgent(BaseAgent):
             Dict with conversation ID and success status
         """
         # Validate sender and recipient
-        if sender_id not in self.agent_states:
-            logger.error(f"Unknown sender: {sender_id}")
+        if not self.store.has_agent(sender_id):
+            logger.error("Unknown sender: %s", sender_id)
             return {"success": False, "error": "Unknown sender"}
             
-        if recipient_id not in self.agent_states:
-            logger.error(f"Unknown recipient: {recipient_id}")
+        if not self.store.has_agent(recipient_id):
+            logger.error("Unknown recipient: %s", recipient_id)
             return {"success": False, "error": "Unknown recipient"}
         
-        # Create conversation ID if this is a new conversation
-        conv_id = f"{sender_id}_{recipient_id}"
-        alt_conv_id = f"{recipient_id}_{sender_id}"
+        # Conversation IDs are direction-independent, so both agents share one conversation
+        first, second = sorted((sender_id, recipient_id))
+        conv_id = f"{first}__{second}"
         
-        # Check if there's an existing conversation in the reverse direction
-        if alt_conv_id in self.conversations and conv_id not in self.conversations:
-            conv_id = alt_conv_id
+        # Store the message; IDs keep counting when old messages are dropped
+        message_id = self.store.add_message(
+            conv_id, sender_id, recipient_id, message, message_type, _now_iso(),
+            retention=self.message_retention
+        )
         
-        # Create or update conversation
-        timestamp = datetime.now().isoformat()
+        if self.max_history_per_conv and self.store.message_count(conv_id) > self.max_history_per_conv:
+            self._compact_conversation(conv_id)
         
-        if conv_id not in self.conversations:
-            self.conversations[conv_id] = {
-                "participants": [sender_id, recipient_id],
-                "started": timestamp,
-                "messages": []
-            }
-        
-        # Add message to conversation
-        message_obj = {
-            "id": len(self.conversations[conv_id]["messages"]) + 1,
-            "sender": sender_id,
-            "recipient": recipient_id,
-            "content": message,
-            "type": message_type,
-            "timestamp": timestamp
-        }
-        
-        self.conversations[conv_id]["messages"].append(message_obj)
-        self.conversations[conv_id]["updated"] = timestamp
-        
-        # Update agent states
-        self.agent_states[sender_id]["last_active"] = timestamp
-        self.agent_states[sender_id]["status"] = "sent_message"
-        self.agent_states[recipient_id]["status"] = "received_message"
-        
-        logger.info(f"Message sent from {sender_id} to {recipient_id}")
+        logger.debug("Message sent from %s to %s", sender_id, recipient_id)
         return {
             "success": True, 
             "conversation_id": conv_id,
-            "message_id": message_obj["id"]
+            "message_id": message_id
         }
 
-    def get_conversation(self, conversation_id):
+    def _compact_conversation(self, conv_id):
+        """Summarize the oldest half of a conversation's history into one message."""
+        old_messages = self.store.oldest_messages(conv_id, self.max_history_per_conv // 2)
+        if len(old_messages) < 2:
+            return
+        
+        # The summary depends only on the messages quoted in the prompt, so it may be reused
+        summary = self._cached_api_call([
+            {"role": "system", "content": "You condense conversations between AI agents, keeping decisions, findings and open questions."},
+            {"role": "user", "content": "Summarize these messages:\n" + json_utils.dumps(old_messages)}
+        ])
+        if not summary or summary.startswith("API"):
+            logger.warning("Could not summarize conversation %s; keeping full history", conv_id)
+            return
+        
+        self.store.compact(conv_id, old_messages[-1]["id"], summary, _now_iso())
+        logger.info("Compacted %d messages of conversation %s", len(old_messages), conv_id)
+
+    def get_conversation(self, conversation_id, columnar=False):
         """Retrieve a specific conversation by ID.
         
         Args:
             conversation_id: ID of the conversation to retrieve
+            columnar: Return messages as parallel per-field lists instead of
+                a list of message dicts
             
         Returns:
             Dict containing conversation data or error
         """
-        if conversation_id in self.conversations:
+        conversation = self.store.get_conversation(conversation_id, columnar=columnar)
+        if conversation is not None:
             return {
                 "success": True,
-                "conversation": self.conversations[conversation_id]
+                "conversation": conversation
             }
         else:
             return {
@@ -145,34 +162,10 @@ class CommunicationAgent(BaseAgent):
         Returns:
             List of conversation summaries
         """
-        if agent_id not in self.agent_states:
+        if not self.store.has_agent(agent_id):
             return {"success": False, "error": f"Unknown agent: {agent_id}"}
         
-        agent_conversations = []
-        
-        for conv_id, conv in self.conversations.items():
-            if agent_id in conv["participants"]:
-                # Create a summary of this conversation
-                other_participant = conv["participants"][0] if conv["participants"][0] != agent_id else conv["participants"][1]
-                
-                # Count messages from and to this agent
-                messages_sent = sum(1 for msg in conv["messages"] if msg["sender"] == agent_id)
-                messages_received = sum(1 for msg in conv["messages"] if msg["recipient"] == agent_id)
-                
-                # Get the most recent message
-                latest_message = conv["messages"][-1] if conv["messages"] else None
-                
-                agent_conversations.append({
-                    "conversation_id": conv_id,
-                    "with_agent": other_participant,
-                    "with_agent_type": self.agent_states[other_participant]["type"],
-                    "messages_count": len(conv["messages"]),
-                    "messages_sent": messages_sent,
-                    "messages_received": messages_received,
-                    "started": conv["started"],
-                    "updated": conv.get("updated", conv["started"]),
-                    "latest_message": latest_message
-                })
+        agent_conversations = self.store.agent_conversations(agent_id)
         
         return {
             "success": True,
@@ -209,7 +202,7 @@ class CommunicationAgent(BaseAgent):
                 )
             
             elif request_type == "get_conversation":
-                result = self.get_conversation(kwargs.get("conversation_id"))
+                result = self.get_conversation(kwargs.get("conversation_id"), kwargs.get("columnar", False))
             
             elif request_type == "get_agent_conversations":
                 result = self.get_agent_conversations(kwargs.get("agent_id"))
@@ -217,7 +210,7 @@ class CommunicationAgent(BaseAgent):
             elif request_type == "get_all_agents":
                 result = {
                     "success": True,
-                    "agents": self.agent_states
+                    "agents": self.store.all_agents()
                 }
                 
             elif request_type == "generate_summary":
@@ -234,16 +227,52 @@ class CommunicationAgent(BaseAgent):
                 }
             
             self.progress = 100
-            return json.dumps(result)
+            return json_utils.dumps(result, default=str)
             
         except Exception as e:
-            logger.error(f"Error processing communication request: {str(e)}")
+            logger.error("Error processing communication request: %s", e)
             self.progress = 100
-            return json.dumps({
+            return json_utils.dumps({
                 "success": False,
                 "error": str(e)
             })
     
+    def process_stream(self, request_type, **kwargs):
+        """Like process, but yield the JSON response as a series of bytes chunks.
+        
+        For get_conversation the messages are read from the store and encoded
+        one at a time, so a long conversation is never serialized as a single
+        string; the chunks can be handed straight to a streaming HTTP response.
+        Other request types are answered by process in a single chunk.
+        
+        Args:
+            request_type: Type of request (see process)
+            **kwargs: Additional arguments specific to the request type
+            
+        Yields:
+            UTF-8 encoded pieces of the JSON document
+        """
+        if request_type != "get_conversation" or kwargs.get("columnar"):
+            yield self.process(request_type, **kwargs).encode("utf-8")
+            return
+        
+        conversation_id = kwargs.get("conversation_id")
+        conversation = self.store.get_conversation(conversation_id, with_messages=False)
+        if conversation is None:
+            yield json_utils.dumps_bytes({
+                "success": False,
+                "error": f"Conversation {conversation_id} not found"
+            })
+            return
+        
+        # Reopen the metadata object to append the messages array to it
+        yield b'{"success":true,"conversation":' + json_utils.dumps_bytes(conversation)[:-1] + b',"messages":['
+        separator = b""
+        for message in self.store.iter_messages(conversation_id):
+            yield separator + json_utils.dumps_bytes(message)
+            separator = b","
+        yield b"]}}"
+    
     def _generate_communication_summary(self, agent_id=None, topic=None):
         """Generate a summary of communications using the LLM.
         
@@ -262,7 +291,8 @@ class CommunicationAgent(BaseAgent):
                 return conv_data
             
             conversations = conv_data.get("conversations", [])
-            agent_type = self.agent_states[agent_id]["type"] if agent_id in self.agent_states else "unknown"
+            agent_state = self.store.get_agent(agent_id)
+            agent_type = agent_state["type"] if agent_state else "unknown"
             
             # Build prompt for the specific agent
             system_prompt = "You are a communication specialist summarizing interactions between AI agents."
@@ -285,14 +315,15 @@ class CommunicationAgent(BaseAgent):
         else:
             # Summarize all communications
             system_prompt = "You are a communication specialist summarizing interactions between AI agents."
+            agent_states = self.store.all_agents()
             user_prompt = f"""
             Summarize the overall communication patterns between all agents.
             
-            Number of agents: {len(self.agent_states)}
-            Number of conversations: {len(self.conversations)}
+            Number of agents: {len(agent_states)}
+            Number of conversations: {self.store.count_conversations()}
             
             Agent types involved:
-            {', '.join(f"{a_data.get('type', 'unknown')}" for a_id, a_data in self.agent_states.items())}
+            {', '.join(f"{a_data.get('type', 'unknown')}" for a_id, a_data in agent_states.items())}
             
             {f'These communications are related to the topic: {topic}' if topic else ''}
             
@@ -317,6 +348,51 @@ class CommunicationAgent(BaseAgent):
             "topic": topic
         }
 
+    def _generate_round_outcomes(self, topic, agents, round_prefixes):
+        """Produce every agent's outcome for a collaboration round.
+        
+        All agents are asked for in one LLM call that returns a JSON object
+        keyed by agent ID; agents missing from a malformed or partial answer
+        fall back to an individual call using their own prompt prefix.
+        
+        Returns:
+            Dict mapping agent IDs to outcome text, in the order of agents
+        """
+        roster = [
+            {"agent_id": agent_id, "role": agent.name, "context": round_prefixes[agent_id][1]["content"]}
+            for agent_id, agent in agents.items()
+        ]
+        batch_prompt = [
+            {"role": "system", "content": "You coordinate a multi-agent collaboration and speak for each agent in turn."},
+            {"role": "user", "content": (
+                f"For each agent below, write that agent's key contribution or findings for this round "
+                f"related to the topic: {topic}, based on its role and context.\n\n"
+                f"Agents:\n{json_utils.dumps(roster)}\n\n"
+                "Respond with only a JSON object mapping each agent_id to its contribution as a string."
+            )}
+        ]
+        
+        outcomes = {}
+        response = self._make_api_call(batch_prompt)
+        start, end = response.find("{"), response.rfind("}")
+        if start != -1 and end > start:
+            try:
+                parsed = json_utils.loads(response[start:end + 1])
+                if isinstance(parsed, dict):
+                    outcomes = {agent_id: str(parsed[agent_id]) for agent_id in agents if parsed.get(agent_id)}
+            except ValueError:
+                logger.warning("Batched round outcomes were not valid JSON; generating them one by one")
+        
+        result = {}
+        for agent_id in agents:
+            if agent_id not in outcomes:
+                outcome_prompt = round_prefixes[agent_id] + [
+                    {"role": "user", "content": f"Based on your role and the communications in this round, summarize your key contribution or findings related to the topic: {topic}"}
+                ]
+                outcomes[agent_id] = self._make_api_call(outcome_prompt)
+            result[agent_id] = outcomes[agent_id]
+        return result
+    
     def facilitate_collaboration(self, topic, agents, max_rounds=3):
         """Facilitate structured collaboration between multiple agents.
         
@@ -328,20 +404,34 @@ class CommunicationAgent(BaseAgent):
         Returns:
             Collaboration result summary
         """
-        logger.info(f"Starting facilitated collaboration on topic: {topic}")
+        logger.info("Starting facilitated collaboration on topic: %s", topic)
         self.progress = 10
         
         try:
             # Register all agents if they aren't already
             for agent_id, agent in agents.items():
-                if agent_id not in self.agent_states:
+                if not self.store.has_agent(agent_id):
                     self.register_agent(agent_id, agent.name.lower().replace(" agent", ""))
             
+            # Per-agent strings that do not change between rounds are built once up front
+            system_messages = {
+                agent_id: {"role": "system", "content": f"You are the {agent.name} participating in a collaborative project on {topic}."}
+                for agent_id, agent in agents.items()
+            }
+            recipient_prompts = {
+                agent_id: {"role": "user", "content": f"You are now communicating with the {agent.name}. Based on your role and expertise, what information, questions, or suggestions would you share with the {agent.name}?"}
+                for agent_id, agent in agents.items()
+            }
+            recipients_of = {
+                agent_id: [recipient_id for recipient_id in agents if recipient_id != agent_id]
+                for agent_id in agents
+            }
+            
             collaboration_rounds = []
             
             # Run the collaboration for a specified number of rounds
             for round_num in range(1, max_rounds + 1):
-                logger.info(f"Starting collaboration round {round_num}/{max_rounds}")
+                logger.info("Starting collaboration round %d/%d", round_num, max_rounds)
                 
                 round_results = {
                     "round": round_num,
@@ -349,59 +439,69 @@ class CommunicationAgent(BaseAgent):
                     "outcomes": {}
                 }
                 
+                round_prefixes = {}  # agent_id -> that agent's prompt prefix for this round
+                
                 # Each agent gets a turn in this round
-                for agent_id, agent in agents.items():
-                    # Get relevant previous messages for this agent
-                    agent_convs = self.get_agent_conversations(agent_id)
-                    
+                for agent_id in agents:
                     # Create a context message for this agent
                     context = f"Round {round_num}/{max_rounds} - Your task is to contribute to the topic: {topic}"
                     
                     if round_num > 1:
-                        # Add summary of previous communications
+                        # Add summary of previous communications; only the latest round is
+                        # quoted in full so the context does not grow with every round
                         context += "\n\nPrevious collaboration context:\n"
                         for prev_round in collaboration_rounds:
                             if agent_id in prev_round["outcomes"]:
-                                context += f"\nYour contribution in round {prev_round['round']}: {prev_round['outcomes'][agent_id]}\n"
+                                outcome = prev_round["outcomes"][agent_id]
+                                if prev_round is not collaboration_rounds[-1]:
+                                    outcome = _truncate(outcome, self.prior_outcome_chars)
+                                    context += f"\nYour contribution in round {prev_round['round']} (compacted): {outcome}\n"
+                                else:
+                                    context += f"\nYour contribution in round {prev_round['round']}: {outcome}\n"
+                    
+                    # Shared prompt prefix for all of this agent's calls in the round; keeping it
+                    # byte-identical lets providers with prefix caching skip re-processing it
+                    stable_prefix = [system_messages[agent_id], {"role": "user", "content": context}]
                     
                     # Each agent sends a message to every other agent
-                    for recipient_id, recipient in agents.items():
-                        if recipient_id != agent_id:
-                            # Generate a message for this recipient
-                            message_prompt = [
-                                {"role": "system", "content": f"You are the {agent.name} communicating with the {recipient.name}."},
-                                {"role": "user", "content": f"{context}\n\nBased on your role and expertise, what information, questions, or suggestions would you share with the {recipient.name}?"}
-                            ]
-                            
-                            self.progress = 30 + (round_num * 10)
-                            message_content = self._make_api_call(message_prompt)
-                            
-                            # Send the message
-                            message_result = self.send_message(
-                                agent_id,
-                                recipient_id,
-                                message_content,
-                                "collaboration"
-                            )
-                            
-                            round_results["messages"].append({
-                                "from": agent_id,
-                                "to": recipient_id,
-                                "content": message_content
-                            })
+                    recipients = recipients_of[agent_id]
                     
-                    # Each agent produces an outcome for this round
-                    outcome_prompt = [
-                        {"role": "system", "content": f"You are the {agent.name} participating in a collaborative project."},
-                        {"role": "user", "content": f"{context}\n\nBased on your role and the communications in this round, summarize your key contribution or findings related to the topic: {topic}"}
-                    ]
+                    def generate_message(recipient_id):
+                        # Generate a message for this recipient
+                        message_prompt = stable_prefix + [recipient_prompts[recipient_id]]
+                        return recipient_id, self._make_api_call(message_prompt)
                     
-                    self.progress = 50 + (round_num * 10)
-                    outcome = self._make_api_call(outcome_prompt)
-                    round_results["outcomes"][agent_id] = outcome
+                    self.progress = 30 + (round_num * 10)
+                    if recipients:
+                        # The LLM calls are independent, so run them concurrently
+                        with ThreadPoolExecutor(max_workers=min(len(recipients), self.max_parallel_calls)) as executor:
+                            generated = list(executor.map(generate_message, recipients))
+                    else:
+                        generated = []
+                    
+                    for recipient_id, message_content in generated:
+                        # Send the message
+                        message_result = self.send_message(
+                            agent_id,
+                            recipient_id,
+                            message_content,
+                            "collaboration"
+                        )
+                        
+                        round_results["messages"].append({
+                            "from": agent_id,
+                            "to": recipient_id,
+                            "content": message_content
+                        })
+                    
+                    round_prefixes[agent_id] = stable_prefix
+                
+                # Every agent produces an outcome for this round, in one batched call
+                self.progress = 50 + (round_num * 10)
+                round_results["outcomes"] = self._generate_round_outcomes(topic, agents, round_prefixes)
                 
                 collaboration_rounds.append(round_results)
-                logger.info(f"Completed collaboration round {round_num}/{max_rounds}")
+                logger.info("Completed collaboration round %d/%d", round_num, max_rounds)
             
             # Generate final collaboration summary
             summary_prompt = [
@@ -415,7 +515,7 @@ class CommunicationAgent(BaseAgent):
             collaboration_summary = self._make_api_call(summary_prompt)
             
             self.progress = 100
-            logger.info(f"Completed facilitated collaboration on topic: {topic}")
+            logger.info("Completed facilitated collaboration on topic: %s", topic)
             
             return {
                 "success": True,
@@ -425,7 +525,7 @@ class CommunicationAgent(BaseAgent):
             }
             
         except Exception as e:
-            logger.error(f"Error in facilitated collaboration: {str(e)}")
+            logger.error("Error in facilitated collaboration: %s", e)
             self.progress = 100
             return {
                 "success": False,
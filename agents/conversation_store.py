@@ -0,0 +1,348 @@
+import os
+import sqlite3
+import logging
+import threading
+from . import json_utils
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    agent_id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    last_active TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    conv_id TEXT PRIMARY KEY,
+    first_participant TEXT NOT NULL,
+    second_participant TEXT NOT NULL,
+    started TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    next_id INTEGER NOT NULL,
+    compaction_count INTEGER NOT NULL DEFAULT 0
+);
+-- One row per (agent, conversation): doubles as the participant index and the message tallies
+CREATE TABLE IF NOT EXISTS participants (
+    agent_id TEXT NOT NULL,
+    conv_id TEXT NOT NULL,
+    sent INTEGER NOT NULL DEFAULT 0,
+    received INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (agent_id, conv_id)
+);
+CREATE TABLE IF NOT EXISTS messages (
+    conv_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    content TEXT NOT NULL,
+    type TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    PRIMARY KEY (conv_id, id)
+) WITHOUT ROWID;
+"""
+
+
+class ConversationStore:
+    """SQLite-backed storage for agent states and the conversations between them.
+
+    With the default ":memory:" path the data lives only as long as the store;
+    pass a file path to keep conversations across restarts.
+    """
+
+    def __init__(self, path=":memory:"):
+        """Open (and if needed create) the store.
+
+        Args:
+            path: SQLite database file, or ":memory:" for a private in-memory store
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def add_agent(self, agent_id, agent_type, description, timestamp):
+        """Register an agent; return False if it already exists."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO agents (agent_id, type, description, status, last_active) "
+                "VALUES (?, ?, ?, 'idle', ?)",
+                (agent_id, agent_type, description, timestamp)
+            )
+        return cursor.rowcount == 1
+
+    def has_agent(self, agent_id):
+        """Return True if agent_id is registered."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM agents WHERE agent_id = ?", (agent_id,)).fetchone()
+        return row is not None
+
+    def get_agent(self, agent_id):
+        """Return the state dict of an agent, or None if it is not registered."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT type, description, status, last_active FROM agents WHERE agent_id = ?", (agent_id,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def all_agents(self):
+        """Return {agent_id: state dict} for every agent, in registration order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT agent_id, type, description, status, last_active FROM agents ORDER BY rowid"
+            ).fetchall()
+        return {row["agent_id"]: {key: row[key] for key in ("type", "description", "status", "last_active")}
+                for row in rows}
+
+    def count_conversations(self):
+        """Return the number of conversations."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def add_message(self, conv_id, sender_id, recipient_id, content, message_type, timestamp, retention=None):
+        """Append a message to a conversation, creating the conversation if needed.
+
+        Also updates both participants' tallies and agent states.
+
+        Args:
+            conv_id: Conversation ID
+            sender_id: ID of the sending agent
+            recipient_id: ID of the receiving agent
+            content: Message content (any JSON-serializable value)
+            message_type: Type of message
+            timestamp: ISO timestamp of the message
+            retention: Keep only this many most recent messages (None keeps all)
+
+        Returns:
+            ID of the new message within its conversation
+        """
+        payload = json_utils.dumps(content)
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                created = conn.execute(
+                    "INSERT OR IGNORE INTO conversations "
+                    "(conv_id, first_participant, second_participant, started, updated, next_id) "
+                    "VALUES (?, ?, ?, ?, ?, 1)",
+                    (conv_id, sender_id, recipient_id, timestamp, timestamp)
+                ).rowcount == 1
+                if created:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO participants (agent_id, conv_id) VALUES (?, ?)",
+                        ((sender_id, conv_id), (recipient_id, conv_id))
+                    )
+
+                message_id = conn.execute(
+                    "SELECT next_id FROM conversations WHERE conv_id = ?", (conv_id,)
+                ).fetchone()[0]
+                conn.execute(
+                    "INSERT INTO messages (conv_id, id, sender, recipient, content, type, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (conv_id, message_id, sender_id, recipient_id, payload, message_type, timestamp)
+                )
+                conn.execute(
+                    "UPDATE conversations SET next_id = next_id + 1, updated = ? WHERE conv_id = ?",
+                    (timestamp, conv_id)
+                )
+                conn.execute(
+                    "UPDATE participants SET sent = sent + 1 WHERE agent_id = ? AND conv_id = ?",
+                    (sender_id, conv_id)
+                )
+                conn.execute(
+                    "UPDATE participants SET received = received + 1 WHERE agent_id = ? AND conv_id = ?",
+                    (recipient_id, conv_id)
+                )
+                if retention:
+                    conn.execute(
+                        "DELETE FROM messages WHERE conv_id = ? AND id <= ?",
+                        (conv_id, message_id - retention)
+                    )
+
+                conn.execute(
+                    "UPDATE agents SET status = 'sent_message', last_active = ? WHERE agent_id = ?",
+                    (timestamp, sender_id)
+                )
+                conn.execute(
+                    "UPDATE agents SET status = 'received_message' WHERE agent_id = ?", (recipient_id,)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return message_id
+
+    def message_count(self, conv_id):
+        """Return how many messages of a conversation are currently stored."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages WHERE conv_id = ?", (conv_id,)).fetchone()[0]
+
+    def oldest_messages(self, conv_id, limit):
+        """Return up to limit of the oldest stored messages of a conversation."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, sender, recipient, content, type, timestamp FROM messages "
+                "WHERE conv_id = ? ORDER BY id LIMIT ?", (conv_id, limit)
+            ).fetchall()
+        return [self._message_dict(row) for row in rows]
+
+    def compact(self, conv_id, upto_id, summary, timestamp):
+        """Replace messages with id <= upto_id by a single summary message.
+
+        The summary takes the ID of the newest message it replaces, so message
+        IDs stay unique and ordered. Tallies and next_id are not affected.
+        """
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM messages WHERE conv_id = ? AND id <= ?", (conv_id, upto_id))
+                conn.execute(
+                    "INSERT INTO messages (conv_id, id, sender, recipient, content, type, timestamp) "
+                    "VALUES (?, ?, 'system', '', ?, 'summary', ?)",
+                    (conv_id, upto_id, json_utils.dumps(summary), timestamp)
+                )
+                conn.execute(
+                    "UPDATE conversations SET compaction_count = compaction_count + 1 WHERE conv_id = ?",
+                    (conv_id,)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def iter_messages(self, conv_id, batch_size=256):
+        """Yield the retained messages of a conversation as dicts, oldest first.
+
+        Messages are read batch_size at a time, so the whole conversation is
+        never held in memory and the store is not locked between batches.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, sender, recipient, content, type, timestamp FROM messages "
+                    "WHERE conv_id = ? AND id > ? ORDER BY id LIMIT ?", (conv_id, last_id, batch_size)
+                ).fetchall()
+            for row in rows:
+                yield self._message_dict(row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    def get_conversation(self, conv_id, columnar=False, with_messages=True):
+        """Return a conversation with its retained messages, or None if unknown.
+
+        Args:
+            conv_id: Conversation ID
+            columnar: Return messages as a dict of parallel lists keyed by
+                field ({"id": [...], "sender": [...], ...}) instead of a list
+                of per-message dicts; cheaper for large conversations and for
+                scanning a single field
+            with_messages: If False, leave out the "messages" key and only
+                return the conversation's metadata
+        """
+        with self._lock:
+            conv = self._conn.execute(
+                "SELECT first_participant, second_participant, started, updated, next_id, compaction_count "
+                "FROM conversations WHERE conv_id = ?", (conv_id,)
+            ).fetchone()
+            if conv is None:
+                return None
+            tallies = self._conn.execute(
+                "SELECT agent_id, sent, received FROM participants WHERE conv_id = ?", (conv_id,)
+            ).fetchall()
+            if with_messages:
+                messages = self._conn.execute(
+                    "SELECT id, sender, recipient, content, type, timestamp FROM messages "
+                    "WHERE conv_id = ? ORDER BY id", (conv_id,)
+                ).fetchall()
+
+        conversation = {
+            "participants": [conv["first_participant"], conv["second_participant"]],
+            "started": conv["started"],
+            "updated": conv["updated"],
+            "next_id": conv["next_id"],
+            "compaction_count": conv["compaction_count"],
+            "sent_count": {row["agent_id"]: row["sent"] for row in tallies},
+            "received_count": {row["agent_id"]: row["received"] for row in tallies}
+        }
+        if with_messages:
+            conversation["messages"] = (self._message_columns(messages) if columnar
+                                        else [self._message_dict(row) for row in messages])
+        return conversation
+
+    def agent_conversations(self, agent_id):
+        """Return summary rows for every conversation agent_id takes part in, oldest first.
+
+        Each row has conversation_id, with_agent, with_agent_type, messages_count
+        (messages currently stored, after retention and compaction), messages_sent,
+        messages_received, started, updated and latest_message.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.conv_id, c.first_participant, c.second_participant, c.started, c.updated, "
+                "p.sent, p.received, a.type AS other_type, "
+                "(SELECT COUNT(*) FROM messages m WHERE m.conv_id = c.conv_id) AS stored "
+                "FROM participants p "
+                "JOIN conversations c ON c.conv_id = p.conv_id "
+                "JOIN agents a ON a.agent_id = CASE WHEN c.first_participant != ? "
+                "THEN c.first_participant ELSE c.second_participant END "
+                "WHERE p.agent_id = ? ORDER BY p.rowid",
+                (agent_id, agent_id)
+            ).fetchall()
+            latest = {
+                row["conv_id"]: self._conn.execute(
+                    "SELECT id, sender, recipient, content, type, timestamp FROM messages "
+                    "WHERE conv_id = ? ORDER BY id DESC LIMIT 1", (row["conv_id"],)
+                ).fetchone()
+                for row in rows
+            }
+
+        return [
+            {
+                "conversation_id": row["conv_id"],
+                "with_agent": row["first_participant"] if row["first_participant"] != agent_id else row["second_participant"],
+                "with_agent_type": row["other_type"],
+                "messages_count": row["stored"],
+                "messages_sent": row["sent"],
+                "messages_received": row["received"],
+                "started": row["started"],
+                "updated": row["updated"],
+                "latest_message": self._message_dict(latest[row["conv_id"]]) if latest[row["conv_id"]] else None
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _message_columns(rows):
+        ids, senders, recipients, contents, types, timestamps = (list(col) for col in zip(*rows)) if rows else tuple([] for _ in range(6))
+        return {
+            "id": ids,
+            "sender": senders,
+            "recipient": recipients,
+            "content": [json_utils.loads(content) for content in contents],
+            "type": types,
+            "timestamp": timestamps
+        }
+
+    @staticmethod
+    def _message_dict(row):
+        return {
+            "id": row["id"],
+            "sender": row["sender"],
+            "recipient": row["recipient"],
+            "content": json_utils.loads(row["content"]),
+            "type": row["type"],
+            "timestamp": row["timestamp"]
+        }
@@ -1,18 +1,25 @@
 import os
+import re
 import json
-import time
 import logging
 import requests
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from . import json_utils
+from .search_cache import SearchResultCache
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the application; this module only emits records
 logger = logging.getLogger(__name__)
 
+# One comma-separated name from the author segment of a SerpAPI summary
+_AUTHOR_RE = re.compile(r"\s*([^,]+?)\s*(?:,|$)")
+
 class GoogleScholar:
     """Client for Google Scholar search API using SerpAPI."""
     
-    def __init__(self, api_key=None, timeout=30, max_retries=1, base_delay=1.0):
+    def __init__(self, api_key=None, timeout=30, max_retries=1, base_delay=1.0, max_workers=8, cache_ttl=3600):
         """Initialize the Google Scholar API client.
         
         Args:
@@ -20,13 +27,64 @@ class GoogleScholar:
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts (default: 1)
             base_delay: Base delay between retries in seconds
+            max_workers: Maximum number of concurrent requests in search_many
+            cache_ttl: Seconds to reuse results for a repeated query (0 disables caching)
         """
         self.api_key = api_key or os.getenv("SERPAPI_KEY", "")
         self.timeout = timeout
         self.max_retries = max_retries
         self.base_delay = base_delay
+        self.max_workers = max_workers
+        
+        # SerpAPI bills per search; repeated queries within cache_ttl are answered from memory
+        self._search_cache = SearchResultCache(maxsize=256, ttl=cache_ttl) if cache_ttl else None
         self.base_url = "https://serpapi.com/search"
         
+        # Query-independent request parameters, rebuilt only when the year rolls over
+        self._base_params = None
+        self._params_year = None
+        
+        # Keep-alive session; urllib3 retries transient failures with exponential
+        # backoff and honours Retry-After. max_retries counts attempts, not retries.
+        retry = Retry(
+            total=max(max_retries - 1, 0),
+            backoff_factor=base_delay,
+            status_forcelist=(429, 500, 502, 503, 504),
+            raise_on_status=False
+        )
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry))
+        
+    def close(self):
+        """Close the underlying HTTP session."""
+        self._session.close()
+        
+    def search_many(self, queries, max_results=10):
+        """Search Google Scholar for several queries concurrently.
+        
+        Args:
+            queries: Iterable of query strings
+            max_results: Maximum number of results per query
+            
+        Returns:
+            List of search results in the same order as queries; a query
+            that failed yields a dict with an empty paper list and an error
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        
+        def search_one(query):
+            try:
+                return self.search(query, max_results=max_results)
+            except (ValueError, requests.exceptions.RequestException) as e:
+                return {"papers": [], "query": query, "error": str(e), "source": "google_scholar"}
+        
+        # The pooled session is shared by the workers, so they reuse its connections
+        workers = min(self.max_workers, len(queries))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(search_one, queries))
+        
     def search(self, query, max_results=10):
         """Search Google Scholar for academic papers on a topic.
         
@@ -42,64 +100,67 @@ class GoogleScholar:
         if not self.api_key:
             raise ValueError("SerpAPI key is required for Google Scholar search")
         
-        # Prepare parameters for Google Scholar search
-        params = {
-            "engine": "google_scholar",
-            "q": query,
-            "api_key": self.api_key,
-            "num": min(max_results, 20),  # SerpAPI has a limit
-            "as_ylo": datetime.now().year - 5  # Papers from last 5 years
-        }
+        base_params = self._get_base_params()
+        cache_key = (query, max_results, base_params["as_ylo"])
+        if self._search_cache:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Returning cached Google Scholar results for: {query}")
+                return cached
         
-        # Make request with retries
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(
-                    self.base_url,
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                
-                # Parse response
-                data = response.json()
-                
-                # Format the results
-                papers = []
-                
-                # Process organic results
-                if "organic_results" in data:
-                    for result in data["organic_results"]:
-                        paper = {
-                            "title": result.get("title", "Unknown Title"),
-                            "authors": self._extract_authors(result),
-                            "summary": result.get("snippet", "No summary available"),
-                            "url": result.get("link", ""),
-                            "published": self._extract_publication_date(result),
-                            "citations": result.get("cited_by", {}).get("total", 0)
-                        }
-                        papers.append(paper)
-                
-                # Return formatted results
-                logger.info(f"Found {len(papers)} papers on Google Scholar")
-                return {
-                    "papers": papers,
-                    "query": query,
-                    "timestamp": datetime.now().isoformat(),
-                    "source": "google_scholar"
-                }
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Google Scholar API request failed (attempt {attempt+1}): {str(e)}")
-                if attempt < self.max_retries - 1:
-                    sleep_time = self.base_delay * (2 ** attempt)  # Exponential backoff
-                    time.sleep(sleep_time)
-                else:
-                    logger.error(f"Max retries exceeded for Google Scholar search")
-                    raise
-        
-        # This should not be reached unless there's a logic error
-        return {"papers": [], "error": "Failed to search Google Scholar"}
+        # Prepare parameters for Google Scholar search; SerpAPI caps num at 20
+        params = {**base_params, "q": query, "num": min(max_results, 20)}
+        
+        try:
+            response = self._session.get(
+                self.base_url,
+                params=params,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Google Scholar API request failed after {self.max_retries} attempt(s): {str(e)}")
+            raise
+        
+        # Parse the raw bytes directly instead of decoding to str first
+        data = json_utils.loads(response.content)
+        
+        # Format the organic results
+        papers = [
+            {
+                "title": result.get("title", "Unknown Title"),
+                "authors": self._extract_authors(result),
+                "summary": result.get("snippet", "No summary available"),
+                "url": result.get("link", ""),
+                "published": self._extract_publication_date(result),
+                "citations": result.get("cited_by", {}).get("total", 0)
+            }
+            for result in data.get("organic_results", ())
+        ]
+        
+        # Return formatted results
+        logger.info(f"Found {len(papers)} papers on Google Scholar")
+        result = {
+            "papers": papers,
+            "query": query,
+            "timestamp": datetime.now().isoformat(),
+            "source": "google_scholar"
+        }
+        if self._search_cache:
+            self._search_cache.set(cache_key, result)
+        return result
+    
+    def _get_base_params(self):
+        """Return the parameters shared by every search, refreshing them on a new year."""
+        year = datetime.now().year
+        if year != self._params_year:
+            self._base_params = {
+                "engine": "google_scholar",
+                "api_key": self.api_key,
+                "as_ylo": year - 5  # Papers from last 5 years
+            }
+            self._params_year = year
+        return self._base_params
     
     def _extract_authors(self, result):
         """Extract author information from a search result."""
@@ -113,10 +174,10 @@ class GoogleScholar:
         if "authors" in publication_info:
             authors = publication_info["authors"]
         elif "summary" in publication_info:
-            # Try to extract author names from summary
-            summary = publication_info["summary"]
-            if "," in summary:
-                authors = [author.strip() for author in summary.split(",")]
+            # Summaries look like "A Smith, B Jones - Journal, 2023 - publisher";
+            # the names are the comma-separated part before the first " - "
+            author_segment = publication_info["summary"].partition(" - ")[0]
+            authors = [name for name in _AUTHOR_RE.findall(author_segment) if name != "…"]
         
         # If no authors were found, use a placeholder
         if not authors:
@@ -0,0 +1,36 @@
+"""JSON helpers that use orjson when it is installed and fall back to the stdlib."""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """Parse a JSON document from str or bytes.
+
+    Raises json.JSONDecodeError on invalid input with either backend.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj):
+    """Serialize obj to UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj, default=None):
+    """Serialize obj to a JSON string.
+
+    Args:
+        obj: Object to serialize
+        default: Called for objects that are not natively serializable
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, default=default, ensure_ascii=False)
@@ -3,25 +3,47 @@ import time
 import json
 import logging
 import requests
+import threading
 from openai import OpenAI
 # Import the full openai module for error handling
 import openai
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from .google_scholar import GoogleScholar
+from .search_cache import DiskCache, SearchResultCache, make_key
 from .scholarly_google import ScholarlyGoogle
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the application; this module only emits records
 logger = logging.getLogger(__name__)
 
+# Keyword arguments accepted by older call sites but not by OpenAI v1.0.0
+_UNSUPPORTED_COMPLETION_KWARGS = frozenset(('proxies', 'request_timeout', 'request_id', 'retry'))
+
 class MCP:
     """Model Content Provider - handles external API access for content retrieval."""
     
-    def __init__(self, api_key=None, timeout=30, max_retries=3, base_delay=1.0):
+    # Shared by all instances; a losing provider search finishes here in the background
+    _search_executor = None
+    _search_executor_lock = threading.Lock()
+    
+    def __init__(self, api_key=None, timeout=30, max_retries=3, base_delay=1.0, cache_ttl=300,
+                 race_providers=False, disk_cache_ttl=86400):
         self.api_key = api_key or os.getenv("SERPAPI_KEY", "")
         self.timeout = timeout
         self.max_retries = max_retries
         self.base_delay = base_delay
         
+        # Opt-in: when both scholarly and SerpAPI are available, query them at the same
+        # time and use whichever answers first. This spends a paid SerpAPI search on
+        # every query, even when scholarly succeeds, so it is off by default
+        self.race_providers = race_providers
+        
+        # Repeated queries within cache_ttl seconds skip the network (0 disables caching)
+        self._search_cache = SearchResultCache(maxsize=256, ttl=cache_ttl) if cache_ttl else None
+        # Below it, a disk cache keeps results for disk_cache_ttl seconds across restarts.
+        # Its v2 keys keep the query's case; entries of the old lowercased-key file are never read
+        self.disk_cache_ttl = disk_cache_ttl
+        self._disk_cache = DiskCache("google_scholar_v2") if disk_cache_ttl else None
+        
         # Initialize Google Scholar clients
         # Try to use ScholarlyGoogle by default (no API key needed)
         try:
@@ -31,7 +53,7 @@ class MCP:
                 base_delay=base_delay
             )
         except Exception as e:
-            logger.error(f"Error initializing ScholarlyGoogle: {str(e)}")
+            logger.error("Error initializing ScholarlyGoogle: %s", e)
             self.scholarly_google = None
         
         # Fall back to SerpAPI if API key is provided
@@ -45,18 +67,19 @@ class MCP:
                     base_delay=base_delay
                 )
             except Exception as e:
-                logger.error(f"Error initializing GoogleScholar: {str(e)}")
+                logger.error("Error initializing GoogleScholar: %s", e)
                 self.google_scholar = None
             
-        # Initialize OpenAI client for compatibility with existing code
-        # OpenAI v1.0.0 doesn't support additional parameters
+        # Initialize OpenAI client for compatibility with existing code; the v1 client
+        # takes the timeout and retry budget directly
         try:
             self.client = OpenAI(
-                api_key=os.getenv("OPENAI_API_KEY", "")
-                # No other parameters should be passed here
+                api_key=os.getenv("OPENAI_API_KEY", ""),
+                timeout=timeout,
+                max_retries=max_retries
             )
         except Exception as e:
-            logger.error(f"Error initializing OpenAI client: {str(e)}")
+            logger.error("Error initializing OpenAI client: %s", e)
             self.client = None
         
     @property
@@ -74,61 +97,112 @@ class MCP:
             logger.error("OpenAI client is not available, chat completion request failed")
             raise ValueError("OpenAI client not initialized")
             
-        # Remove any parameters not supported by OpenAI v1.0.0
-        if 'proxies' in kwargs:
-            kwargs.pop('proxies')
-        if 'request_timeout' in kwargs:
-            kwargs.pop('request_timeout')
-        if 'request_id' in kwargs:
-            kwargs.pop('request_id')
-        if 'retry' in kwargs:
-            kwargs.pop('retry')
+        # Remove any parameters not supported by OpenAI v1.0.0; only copy when one is present
+        if kwargs.keys() & _UNSUPPORTED_COMPLETION_KWARGS:
+            kwargs = {k: v for k, v in kwargs.items() if k not in _UNSUPPORTED_COMPLETION_KWARGS}
         
         try:    
             # Use the v1.0.0 API format
             return self.client.chat.completions.create(**kwargs)
         except Exception as e:
-            logger.error(f"OpenAI chat completion error: {str(e)}")
+            logger.error("OpenAI chat completion error: %s", e)
             raise
         
-    def chat_completions(self):
-        """Get the chat completions interface."""
-        if not self.client:
-            logger.error("OpenAI client is not available, cannot access chat completions")
-            raise ValueError("OpenAI client not initialized")
-        return self.client.chat.completions
+    def chat_completions_batch(self, kwargs_list, concurrency=20):
+        """Create several chat completions concurrently.
+        
+        Args:
+            kwargs_list: One dict of chat_completions_create arguments per prompt
+            concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            List with one completion per prompt, in the same order; a prompt
+            that failed yields its exception instead of a completion
+        """
+        kwargs_list = list(kwargs_list)
+        if not kwargs_list:
+            return []
+        
+        def create_one(kwargs):
+            try:
+                return self.chat_completions_create(**kwargs)
+            except Exception as e:
+                return e
+        
+        # The client's connection pool is shared by the workers; each call spends
+        # its time waiting on the API, so threads overlap the latency
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(kwargs_list))) as executor:
+            return list(executor.map(create_one, kwargs_list))
         
-    def search_papers(self, query, max_results=10, timeout=None):
+    def search_papers(self, query, max_results=10, timeout=None, force_refresh=False):
         """Search for academic papers using Google Scholar.
         
         Args:
             query: Search query string
             max_results: Maximum number of results to return
             timeout: Custom timeout for the search request (overrides default)
+            force_refresh: Bypass the result cache and search again
             
         Returns:
             Dictionary containing search results
         """
+        cache_key = make_key(query.strip(), "google_scholar", max_results)
+        if not force_refresh:
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                logger.info("Returning cached paper search results for: %s", query)
+                return cached
+        
+        results = self._search_papers_uncached(query, max_results, timeout)
+        if results.get('papers'):
+            self._set_cached(cache_key, results)
+        return results
+        
+    def _get_cached(self, cache_key):
+        """Return a cached result from memory or, failing that, from disk."""
+        if self._search_cache:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        if self._disk_cache:
+            cached = self._disk_cache.get(cache_key)
+            if cached is not None and self._search_cache:
+                self._search_cache.set(cache_key, cached)
+            return cached
+        return None
+    
+    def _set_cached(self, cache_key, result):
+        """Store a result in the memory and disk caches."""
+        if self._search_cache:
+            self._search_cache.set(cache_key, result)
+        if self._disk_cache:
+            self._disk_cache.set(cache_key, result, expire=self.disk_cache_ttl)
+        
+    def _search_papers_uncached(self, query, max_results, timeout):
+        """Run search_papers against the available Google Scholar clients."""
         try:
             # Apply timeout if provided
             search_timeout = timeout or self.timeout
             
+            if self.race_providers and self.scholarly_google and self.google_scholar:
+                return self._race_providers(query, max_results, search_timeout)
+            
             # First try using the scholarly library (no API key needed)
             if self.scholarly_google:
                 try:
-                    logger.info(f"Trying to search papers using scholarly with timeout={search_timeout}s")
+                    logger.info("Trying to search papers using scholarly with timeout=%ss", search_timeout)
                     # Note: scholarly doesn't support timeout parameter, so we can't pass it
                     results = self.scholarly_google.search(query, max_results=max_results)
                     if results.get('papers'):
                         return results
                 except Exception as e:
-                    logger.warning(f"Scholarly search failed: {str(e)}. Trying alternative method...")
+                    logger.warning("Scholarly search failed: %s. Trying alternative method...", e)
             else:
                 logger.warning("ScholarlyGoogle client is not available, skipping this search method")
             
             # If scholarly fails and we have an API key, try using SerpAPI
             if self.google_scholar:
-                logger.info(f"Trying to search papers using SerpAPI with timeout={search_timeout}s")
+                logger.info("Trying to search papers using SerpAPI with timeout=%ss", search_timeout)
                 # Override the timeout for faster failure
                 self.google_scholar.timeout = search_timeout
                 results = self.google_scholar.search(query, max_results=max_results)
@@ -144,7 +218,7 @@ class MCP:
                 }
                 
         except Exception as e:
-            logger.error(f"Error searching for papers: {str(e)}")
+            logger.error("Error searching for papers: %s", e)
             # Return empty results on error
             return {
                 "papers": [],
@@ -152,4 +226,49 @@ class MCP:
                 "query": query,
                 "timestamp": time.time(),
                 "source": "google_scholar_error"
-            } 
\ No newline at end of file
+            } 
+    
+    @classmethod
+    def _get_search_executor(cls):
+        """Return the thread pool used to run provider searches side by side."""
+        if cls._search_executor is None:
+            with cls._search_executor_lock:
+                if cls._search_executor is None:
+                    cls._search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-search")
+        return cls._search_executor
+    
+    def _race_providers(self, query, max_results, search_timeout):
+        """Search scholarly and SerpAPI concurrently; return the first result with papers.
+        
+        If neither finds papers, the SerpAPI result is returned, as in the
+        sequential fallback; if both fail, the last error is raised.
+        """
+        logger.info("Searching papers using scholarly and SerpAPI concurrently with timeout=%ss", search_timeout)
+        self.google_scholar.timeout = search_timeout
+        executor = self._get_search_executor()
+        providers = {
+            executor.submit(self.scholarly_google.search, query, max_results=max_results): "scholarly",
+            executor.submit(self.google_scholar.search, query, max_results=max_results): "SerpAPI"
+        }
+        
+        pending = set(providers)
+        serpapi_results = None
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.warning("%s search failed: %s", providers[future], e)
+                    error = e
+                    continue
+                if results.get('papers'):
+                    # The slower search keeps running in the pool; its result is discarded
+                    return results
+                if providers[future] == "SerpAPI":
+                    serpapi_results = results
+        
+        if serpapi_results is not None:
+            return serpapi_results
+        raise error
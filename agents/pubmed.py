@@ -1,45 +1,230 @@
 import os
+import re
 import time
 import json
 import logging
+import functools
 import requests
-import xml.etree.ElementTree as ET
+import urllib3
+from requests.adapters import HTTPAdapter
+from io import BytesIO
+from itertools import chain
 from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from .search_cache import DiskCache, SearchResultCache, make_key
+from .retry import exponential_delay, is_retryable_status, retry_after
+from .rate_limiter import RateLimiter
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Prefer the libxml2-backed parser when it is installed
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+# Logging is configured by the application; this module only emits records
 logger = logging.getLogger(__name__)
 
+# Failures while downloading a response; reading the raw stream raises urllib3's
+# own errors (e.g. ProtocolError on a connection reset) rather than requests'
+_TRANSPORT_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError)
+
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+# Map of common Chinese medical terms to English equivalents
+_TERM_MAP = {
+    "骨科": "orthopedics",
+    "大模型": "large language model",
+    "模型": "model",
+    "麻醉": "anesthesia",
+    "人工智能": "artificial intelligence",
+    "机器学习": "machine learning",
+    "深度学习": "deep learning"
+}
+# Longest terms first so that "大模型" wins over "模型"
+_TERM_RE = re.compile("|".join(map(re.escape, sorted(_TERM_MAP, key=len, reverse=True))))
+
+# Paths of the fields read from each PubmedArticle; those after _ARTICLE_PATH
+# are relative to the MedlineCitation/Article element
+_PMID_PATH = 'MedlineCitation/PMID'
+_ARTICLE_PATH = 'MedlineCitation/Article'
+_TITLE_PATH = 'ArticleTitle'
+_ABSTRACT_PATH = 'Abstract/AbstractText'
+_AUTHOR_PATH = 'AuthorList/Author'
+_JOURNAL_PATH = 'Journal/Title'
+_YEAR_PATH = 'Journal/JournalIssue/PubDate/Year'
+
+
+
+def _abstract_section(element):
+    """Return the text of an AbstractText element, prefixed with its label if any."""
+    text = element.text or ""
+    label = element.get('Label')
+    return f"{label}: {text}" if label else text
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_chinese(query):
+    """Return True if the query contains CJK characters."""
+    return _CJK_RE.search(query) is not None
+
+
+@functools.lru_cache(maxsize=512)
+def _enhance_chinese_query(query):
+    """Enhance Chinese query for better results in PubMed."""
+    # All terms are replaced in a single pass over the query
+    return _TERM_RE.sub(lambda m: _TERM_MAP[m.group(0)], query)
+
+
 class PubMed:
     """Client for searching academic papers on PubMed."""
     
-    def __init__(self, timeout=30, max_retries=3, base_delay=1.0):
+    # A duplicate of a running search only queues on the rate limiter behind it
+    # and spends NCBI's budget, so callers should not hedge searches
+    hedgeable = False
+    
+    def __init__(self, timeout=30, max_retries=3, base_delay=1.0, api_key=None, max_workers=None, cache_ttl=300,
+                 max_delay=30.0, jitter=0.5, disk_cache_ttl=86400, session=None):
+        """Initialize the PubMed client.
+        
+        Args:
+            timeout: Request timeout in seconds
+            max_retries: Maximum number of attempts for a search request
+            base_delay: Base delay between retries in seconds
+            api_key: NCBI API key (optional, falls back to NCBI_API_KEY from env);
+                raises the E-utilities allowance from 3 to 10 requests per second
+            max_workers: Maximum number of concurrent searches in search_many
+                (defaults to the E-utilities per-second allowance)
+            cache_ttl: Seconds to reuse results for a repeated query (0 disables caching)
+            disk_cache_ttl: Seconds to keep results on disk, across restarts
+                (0 disables the disk cache)
+            max_delay: Upper bound for a single retry delay in seconds
+            jitter: Maximum fraction of random extra delay, so that parallel
+                clients do not retry in lockstep
+            session: requests.Session to share with other clients (default: a
+                session of its own); it is left open by close()
+        """
         self.timeout = timeout
         self.max_retries = max_retries
         self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.api_key = api_key or os.getenv("NCBI_API_KEY", "")
+        self.max_workers = max_workers or (10 if self.api_key else 3)
+        self.fetch_chunk_size = 20  # IDs per EFetch request
+        
+        # Pace requests to NCBI's allowance up front instead of only reacting to 429s
+        requests_per_second = 10 if self.api_key else 3
+        self.limiter = RateLimiter(
+            min_request_interval=1.0 / requests_per_second + 0.01,
+            max_requests_per_minute=requests_per_second * 60
+        )
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
         self.search_url = f"{self.base_url}/esearch.fcgi"
         self.summary_url = f"{self.base_url}/esummary.fcgi"
         self.fetch_url = f"{self.base_url}/efetch.fcgi"
         
-    def search(self, query, max_results=10, timeout=None):
-        """Search PubMed for papers related to the query."""
+        # Repeated queries within cache_ttl are answered from memory, sparing
+        # NCBI's rate budget
+        self._search_cache = SearchResultCache(maxsize=256, ttl=cache_ttl) if cache_ttl else None
+        # Below it, a disk cache survives restarts so reruns skip ESearch and EFetch.
+        # Its v2 keys keep the query's case (Entrez operators are case-sensitive);
+        # entries of the old lowercased-key file are never read
+        self.disk_cache_ttl = disk_cache_ttl
+        self._disk_cache = DiskCache("pubmed_v2") if disk_cache_ttl else None
+        
+        # Keep-alive session shared by all searches (including search_many workers and
+        # concurrent EFetch chunks); retries are handled by the search loop itself
+        self._owns_session = session is None
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+            session.headers.update({"User-Agent": "AutoPaper/1.0", "Accept-Encoding": "gzip"})
+        self._session = session
+        
+    def close(self):
+        """Close the underlying HTTP session unless it was passed in."""
+        if self._owns_session:
+            self._session.close()
+    
+    def warmup(self):
+        """Open a pooled connection to E-utilities ahead of the first search.
+        
+        Failures are ignored; the first search then connects as usual.
+        """
+        try:
+            self.ping(self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.debug("PubMed connection warm-up failed: %s", e)
+    
+    def ping(self, timeout=3):
+        """Check that E-utilities is reachable with a HEAD request.
+        
+        Returns:
+            True unless the server answers with a 5xx status; connection
+            errors raise requests.exceptions.RequestException
+        """
+        # NCBI counts every request, so this one takes a rate limiter slot too
+        self.limiter.wait()
+        response = self._session.head(self.search_url, timeout=timeout)
+        response.close()
+        return response.status_code < 500
+        
+    def search_many(self, queries, max_results=10, timeout=None):
+        """Search PubMed for several queries concurrently.
+        
+        Args:
+            queries: Iterable of query strings
+            max_results: Maximum number of results per query
+            timeout: Custom timeout for each request (overrides default)
+            
+        Returns:
+            List of search results in the same order as queries
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        
+        # Network latency dominates, so overlap the requests on a pool sized to
+        # NCBI's per-second allowance
+        workers = min(self.max_workers, len(queries))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda q: self.search(q, max_results=max_results, timeout=timeout),
+                queries
+            ))
+        
+    def search(self, query, max_results=10, timeout=None, force_refresh=False):
+        """Search PubMed for papers related to the query.
+        
+        Args:
+            query: Search query string
+            max_results: Maximum number of results to return
+            timeout: Custom timeout for the request (overrides default)
+            force_refresh: Bypass the result cache and query PubMed again
+        """
         timeout = timeout or self.timeout
-        logger.info(f"Searching PubMed for: {query}")
+        logger.info("Searching PubMed for: %s", query)
+        
+        cache_key = make_key(query.strip(), "pubmed", max_results)
+        if not force_refresh:
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                logger.info("Returning cached PubMed results for: %s", query)
+                return cached
         
         # If query is in Chinese, try to enhance it for better results
-        is_chinese = any('\u4e00' <= char <= '\u9fff' for char in query)
-        if is_chinese:
-            query = self._enhance_chinese_query(query)
+        if _is_chinese(query):
+            query = _enhance_chinese_query(query)
+            logger.info("Enhanced PubMed query: %s", query)
             
         # Encode the query for URL
         encoded_query = quote(query)
         
         # Get paper IDs matching the query
         try:
-            paper_ids = self._search_paper_ids(encoded_query, max_results, timeout)
+            paper_ids, history = self._search_paper_ids(encoded_query, max_results, timeout)
             if not paper_ids:
-                logger.warning(f"No paper IDs found for query: {query}")
+                logger.warning("No paper IDs found for query: %s", query)
                 return {
                     'papers': [],
                     'total_results': 0,
@@ -49,17 +234,21 @@ class PubMed:
                 }
                 
             # Get details for each paper ID
-            papers = self._fetch_paper_details(paper_ids, timeout)
+            papers, complete = self._fetch_paper_details(paper_ids, timeout, history)
             
-            return {
+            result = {
                 'papers': papers,
                 'total_results': len(papers),
                 'query': query,
                 'timestamp': time.time(),
                 'source': 'pubmed'
             }
+            # A result missing a failed chunk is returned but not cached
+            if papers and complete:
+                self._set_cached(cache_key, result)
+            return result
         except Exception as e:
-            logger.error(f"Error searching PubMed: {str(e)}")
+            logger.error("Error searching PubMed: %s", e)
             return {
                 'papers': [],
                 'total_results': 0,
@@ -69,175 +258,252 @@ class PubMed:
                 'source': 'pubmed_error'
             }
     
-    def _enhance_chinese_query(self, query):
-        """Enhance Chinese query for better results in PubMed."""
-        # Map of common Chinese medical terms to English equivalents
-        term_map = {
-            "骨科": "orthopedics",
-            "大模型": "large language model",
-            "模型": "model",
-            "麻醉": "anesthesia",
-            "人工智能": "artificial intelligence",
-            "机器学习": "machine learning",
-            "深度学习": "deep learning"
-        }
-        
-        enhanced_query = query
-        for cn_term, en_term in term_map.items():
-            if cn_term in query:
-                enhanced_query = enhanced_query.replace(cn_term, en_term)
-                
-        logger.info(f"Enhanced PubMed query: {enhanced_query}")
-        return enhanced_query
-        
     def _search_paper_ids(self, query, max_results, timeout):
-        """Search PubMed and get paper IDs."""
+        """Search PubMed and get paper IDs.
+        
+        Returns:
+            Tuple of the matching paper IDs and the (WebEnv, query_key) handle
+            of the result set on NCBI's history server (None if not returned)
+        """
         search_params = {
             'db': 'pubmed',
             'term': query,
             'retmax': max_results,
             'retmode': 'json',
-            'sort': 'relevance'
+            'sort': 'relevance',
+            'usehistory': 'y'
         }
+        if self.api_key:
+            search_params['api_key'] = self.api_key
         
         # Try with retries
         for attempt in range(self.max_retries):
             try:
-                logger.info(f"PubMed search attempt {attempt+1}/{self.max_retries}")
-                response = requests.get(self.search_url, params=search_params, timeout=timeout)
+                logger.info("PubMed search attempt %d/%d", attempt + 1, self.max_retries)
+                self.limiter.wait()
+                response = self._session.get(self.search_url, params=search_params, timeout=timeout)
                 
                 if response.status_code == 200:
-                    data = response.json()
-                    paper_ids = data.get('esearchresult', {}).get('idlist', [])
-                    logger.info(f"Found {len(paper_ids)} paper IDs on PubMed")
-                    return paper_ids
+                    result = response.json().get('esearchresult', {})
+                    paper_ids = result.get('idlist', [])
+                    history = None
+                    if result.get('webenv') and result.get('querykey'):
+                        history = (result['webenv'], result['querykey'])
+                    logger.info("Found %d paper IDs on PubMed", len(paper_ids))
+                    return paper_ids, history
+                    
+                elif not is_retryable_status(response.status_code):
+                    # Client errors such as a malformed or too long query won't fix themselves
+                    logger.error("PubMed API error: %d, not retrying", response.status_code)
+                    return [], None
                     
                 elif response.status_code == 429:
                     # Rate limited
-                    logger.warning(f"PubMed rate limit reached (attempt {attempt+1})")
-                    wait_time = self.base_delay * (2 ** attempt)  # Exponential backoff
-                    logger.info(f"Waiting {wait_time} seconds before retry")
-                    time.sleep(wait_time)
+                    logger.warning("PubMed rate limit reached (attempt %d)", attempt + 1)
+                    if attempt < self.max_retries - 1:
+                        wait_time = self._backoff(attempt, response)
+                        logger.info("Waiting %.2f seconds before retry", wait_time)
+                        time.sleep(wait_time)
                     
                 else:
-                    # Other error
-                    logger.error(f"PubMed API error: {response.status_code}")
+                    # Transient server error
+                    logger.error("PubMed API error: %d", response.status_code)
                     if attempt < self.max_retries - 1:
-                        wait_time = self.base_delay * (2 ** attempt)
-                        time.sleep(wait_time)
+                        time.sleep(self._backoff(attempt, response))
                     else:
                         break
                         
             except requests.exceptions.RequestException as e:
-                logger.error(f"PubMed API request error: {str(e)} (attempt {attempt+1})")
+                logger.error("PubMed API request error: %s (attempt %d)", e, attempt + 1)
                 if attempt < self.max_retries - 1:
-                    wait_time = self.base_delay * (2 ** attempt)
-                    time.sleep(wait_time)
+                    time.sleep(self._backoff(attempt))
                 else:
                     break
                     
         # If we got here, all attempts failed
-        logger.error(f"All {self.max_retries} PubMed search attempts failed")
-        return []
+        logger.error("All %d PubMed search attempts failed", self.max_retries)
+        return [], None
+        
+    def _get_cached(self, cache_key):
+        """Return a cached result from memory or, failing that, from disk."""
+        if self._search_cache:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        if self._disk_cache:
+            cached = self._disk_cache.get(cache_key)
+            if cached is not None and self._search_cache:
+                self._search_cache.set(cache_key, cached)
+            return cached
+        return None
+    
+    def _set_cached(self, cache_key, result):
+        """Store a result in the memory and disk caches."""
+        if self._search_cache:
+            self._search_cache.set(cache_key, result)
+        if self._disk_cache:
+            self._disk_cache.set(cache_key, result, expire=self.disk_cache_ttl)
+        
+    def _backoff(self, attempt, response=None):
+        """Return the delay before retrying after a failed attempt.
         
-    def _fetch_paper_details(self, paper_ids, timeout):
-        """Fetch details for paper IDs from PubMed."""
+        A Retry-After header on the response takes precedence over the
+        jittered exponential backoff.
+        """
+        if response is not None:
+            delay = retry_after(response, self.max_delay)
+            if delay is not None:
+                return delay
+        return exponential_delay(self.base_delay, attempt, self.max_delay, self.jitter)
+        
+    def _fetch_paper_details(self, paper_ids, timeout, history=None):
+        """Fetch details for paper IDs from PubMed.
+        
+        IDs are fetched in chunks of fetch_chunk_size, concurrently, so a large
+        result set is not one long serial download and a failed request only
+        loses its own chunk.
+        
+        Args:
+            paper_ids: IDs returned by ESearch
+            timeout: Request timeout in seconds
+            history: (WebEnv, query_key) from ESearch; when given, chunks are
+                requested by position in the stored result set instead of by
+                a comma-joined ID list, which keeps the URLs short
+        
+        Returns:
+            Tuple of the papers of every fetched chunk and whether all chunks
+            were fetched
+        """
         if not paper_ids:
-            return []
-            
-        # Convert list of IDs to comma-separated string
-        id_string = ','.join(paper_ids)
+            return [], True
+        
+        starts = range(0, len(paper_ids), self.fetch_chunk_size)
+        if history:
+            webenv, query_key = history
+            chunks = [{'WebEnv': webenv, 'query_key': query_key, 'retstart': start,
+                       'retmax': len(paper_ids[start:start + self.fetch_chunk_size])}
+                      for start in starts]
+        else:
+            chunks = [{'id': ','.join(paper_ids[start:start + self.fetch_chunk_size])} for start in starts]
+        
+        if len(chunks) == 1:
+            results = [self._fetch_chunk(chunks[0], timeout)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                results = list(executor.map(lambda chunk: self._fetch_chunk(chunk, timeout), chunks))
+        
+        complete = None not in results
+        return list(chain.from_iterable(r for r in results if r is not None)), complete
+    
+    def _fetch_chunk(self, chunk_params, timeout):
+        """Fetch and parse the details of one chunk of papers.
+        
+        Args:
+            chunk_params: EFetch parameters selecting the chunk (id, or
+                WebEnv/query_key/retstart/retmax)
+            timeout: Request timeout in seconds
         
-        # Prepare parameters for summary request
+        Returns:
+            List of the chunk's papers, or None if it could not be fetched
+        """
         fetch_params = {
             'db': 'pubmed',
-            'id': id_string,
             'retmode': 'xml',
-            'rettype': 'abstract'
+            'rettype': 'abstract',
+            **chunk_params
         }
+        if self.api_key:
+            fetch_params['api_key'] = self.api_key
         
-        papers = []
-        try:
-            response = requests.get(self.fetch_url, params=fetch_params, timeout=timeout)
-            
-            if response.status_code == 200:
-                xml_data = response.text
-                papers = self._parse_pubmed_xml(xml_data)
-                return papers
-            else:
-                logger.error(f"PubMed fetch error: {response.status_code}")
-                return []
+        # Retry only failures that may succeed on another attempt
+        for attempt in range(self.max_retries):
+            response = None
+            try:
+                # Stream the body so articles are parsed while the XML is still downloading
+                self.limiter.wait()
+                response = self._session.get(self.fetch_url, params=fetch_params, timeout=timeout, stream=True)
                 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"PubMed fetch request error: {str(e)}")
-            return []
+                if response.status_code == 200:
+                    with response:
+                        response.raw.decode_content = True
+                        return self._parse_pubmed_xml(response.raw)
+                
+                response.close()
+                logger.error("PubMed fetch error: %d", response.status_code)
+                if not is_retryable_status(response.status_code):
+                    return None
+                    
+            except _TRANSPORT_ERRORS as e:
+                # Includes a download broken off mid-stream; the partly parsed chunk is refetched
+                logger.error("PubMed fetch request error: %s (attempt %d)", e, attempt + 1)
+            
+            if attempt < self.max_retries - 1:
+                time.sleep(self._backoff(attempt, response))
+        
+        return None
             
     def _parse_pubmed_xml(self, xml_data):
-        """Parse PubMed XML response into structured paper data."""
+        """Parse PubMed XML response into structured paper data.
+        
+        Args:
+            xml_data: File-like object yielding the EFetch body (e.g. a raw
+                streamed response), or the body as str/bytes
+        """
+        if isinstance(xml_data, str):
+            xml_data = xml_data.encode("utf-8")
+        if isinstance(xml_data, bytes):
+            xml_data = BytesIO(xml_data)
+        
         papers = []
         try:
-            root = ET.fromstring(xml_data)
-            article_elements = root.findall('.//PubmedArticle')
-            
-            for article in article_elements:
+            # Stream the articles and discard each one once parsed, so memory
+            # stays flat no matter how many IDs were fetched
+            for _, article in ET.iterparse(xml_data, events=('end',)):
+                if article.tag != 'PubmedArticle':
+                    continue
                 try:
-                    # Extract basic metadata
-                    pmid = article.find('.//PMID').text
-                    article_element = article.find('.//Article')
-                    
-                    # Title
-                    title_element = article_element.find('.//ArticleTitle')
-                    title = title_element.text if title_element is not None else "Untitled"
-                    
-                    # Abstract
-                    abstract_element = article_element.find('.//AbstractText')
-                    abstract = abstract_element.text if abstract_element is not None else ""
-                    
-                    # Authors
-                    author_elements = article_element.findall('.//Author')
-                    authors = []
-                    
-                    for author in author_elements:
-                        lastname = author.find('.//LastName')
-                        forename = author.find('.//ForeName')
-                        
-                        if lastname is not None and forename is not None:
-                            author_name = f"{forename.text} {lastname.text}"
-                            authors.append(author_name)
-                        elif lastname is not None:
-                            authors.append(lastname.text)
-                            
-                    # Journal
-                    journal_element = article_element.find('.//Journal/Title')
-                    journal = journal_element.text if journal_element is not None else "Unknown Journal"
-                    
-                    # Year
-                    year_element = article_element.find('.//PubDate/Year')
-                    year = year_element.text if year_element is not None else "Unknown Year"
-                    
-                    # URL
-                    url = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-                    
-                    # Create paper object
-                    paper = {
-                        'title': title,
-                        'authors': authors,
-                        'abstract': abstract,
-                        'url': url,
-                        'journal': journal,
-                        'year': year,
-                        'id': pmid,
-                        'source': 'pubmed'
-                    }
-                    
-                    papers.append(paper)
-                    
+                    papers.append(self._parse_article(article))
                 except Exception as e:
-                    logger.error(f"Error parsing individual PubMed article: {str(e)}")
-                    continue
+                    logger.error("Error parsing individual PubMed article: %s", e)
+                article.clear()
+                # lxml keeps cleared siblings attached to the root; drop them too
+                if hasattr(article, 'getprevious'):
+                    while article.getprevious() is not None:
+                        del article.getparent()[0]
                     
             return papers
             
+        except _TRANSPORT_ERRORS:
+            # A broken download is a failed attempt for _fetch_chunk to retry, not bad XML
+            raise
         except Exception as e:
-            logger.error(f"Error parsing PubMed XML: {str(e)}")
-            return [] 
\ No newline at end of file
+            logger.error("Error parsing PubMed XML: %s", e)
+            return []
+    
+    def _parse_article(self, article):
+        """Extract paper data from a single PubmedArticle element."""
+        # Direct child paths avoid descendant scans of the article
+        pmid = article.find(_PMID_PATH).text
+        article_element = article.find(_ARTICLE_PATH)
+        
+        # Authors without a last name (e.g. collective names) are skipped
+        authors = [
+            f"{author.findtext('ForeName', '')} {author.findtext('LastName')}".lstrip()
+            for author in article_element.iterfind(_AUTHOR_PATH)
+            if author.find('LastName') is not None
+        ]
+        
+        # Structured abstracts have one labelled AbstractText per section
+        # (Background, Methods, ...); keep them all
+        abstract = " ".join(filter(None, map(_abstract_section, article_element.iterfind(_ABSTRACT_PATH))))
+        
+        return {
+            'title': article_element.findtext(_TITLE_PATH, "Untitled"),
+            'authors': authors,
+            'abstract': abstract,
+            'url': f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+            'journal': article_element.findtext(_JOURNAL_PATH, "Unknown Journal"),
+            'year': article_element.findtext(_YEAR_PATH, "Unknown Year"),
+            'id': pmid,
+            'source': 'pubmed'
+        }
@@ -0,0 +1,76 @@
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Upper bound for a single retry sleep, in seconds
+MAX_RETRY_DELAY = 8.0
+
+# HTTP status codes that will fail the same way on every retry
+NON_RETRYABLE_STATUS = frozenset({400, 401, 403, 404, 422})
+
+
+def is_retryable_status(status_code):
+    """Return True for HTTP statuses worth retrying: timeouts, rate limits and 5xx."""
+    return status_code in (408, 429) or status_code >= 500
+
+
+def capped_delay(base_delay, attempt, max_delay=MAX_RETRY_DELAY, jitter=0.25):
+    """Return how long to sleep before retrying after a failed attempt.
+
+    The delay grows linearly with the attempt number, is capped at max_delay
+    and gets up to `jitter` of itself added so that clients retrying the same
+    endpoint do not stay in lockstep.
+
+    Args:
+        base_delay: Delay after the first failed attempt, in seconds
+        attempt: Zero-based index of the attempt that just failed
+        max_delay: Upper bound for the delay before jitter
+        jitter: Maximum fraction of the delay added at random
+
+    Returns:
+        Delay in seconds
+    """
+    delay = min(base_delay * (attempt + 1), max_delay)
+    return delay + random.uniform(0, jitter * delay)
+
+
+def exponential_delay(base_delay, attempt, max_delay=30.0, jitter=0.5):
+    """Return a jittered exponential backoff delay for a failed attempt.
+
+    Args:
+        base_delay: Delay after the first failed attempt, in seconds
+        attempt: Zero-based index of the attempt that just failed
+        max_delay: Upper bound for the delay before jitter
+        jitter: Maximum fraction of the delay added at random
+
+    Returns:
+        Delay in seconds
+    """
+    delay = min(max_delay, base_delay * (2 ** attempt))
+    return delay * (1 + random.uniform(0, jitter))
+
+
+def retry_after(response, max_delay=None):
+    """Return the delay requested by a response's Retry-After header, if any.
+
+    Both the delay-seconds and the HTTP-date forms are understood.
+
+    Args:
+        response: HTTP response with a headers mapping
+        max_delay: Upper bound for the returned delay (None for no bound)
+
+    Returns:
+        Delay in seconds, or None if the header is missing or malformed
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    delay = max(delay, 0.0)
+    return min(delay, max_delay) if max_delay is not None else delay
@@ -5,9 +5,9 @@ import logging
 import random
 from datetime import datetime
 from scholarly import scholarly
+from .retry import exponential_delay
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the application; this module only emits records
 logger = logging.getLogger(__name__)
 
 class ScholarlyGoogle:
@@ -94,8 +94,9 @@ class ScholarlyGoogle:
             except Exception as e:
                 logger.error(f"Google Scholar search with scholarly failed (attempt {attempt+1}): {str(e)}")
                 if attempt < self.max_retries - 1:
-                    sleep_time = self.base_delay * (2 ** attempt)  # Exponential backoff
-                    logger.info(f"Waiting {sleep_time} seconds before retry")
+                    # Jittered exponential backoff, so concurrent searches do not retry in lockstep
+                    sleep_time = exponential_delay(self.base_delay, attempt)
+                    logger.info(f"Waiting {sleep_time:.1f} seconds before retry")
                     time.sleep(sleep_time)
                 else:
                     logger.error(f"Max retries exceeded for Google Scholar scholarly search")
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Default location for persistent caches; override with AUTOPAPER_CACHE_DIR
+DEFAULT_CACHE_DIR = os.getenv(
+    "AUTOPAPER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "autopaper")
+)
+
+
+def make_key(*parts):
+    """Build a fixed-length cache key from the given parts."""
+    raw = "\x1f".join(str(part) for part in parts)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """Persistent key/value cache with per-entry expiry, stored in SQLite.
+
+    Values must be JSON-serializable. If the cache file cannot be opened the
+    cache logs a warning and behaves as always-empty, so callers never need
+    to handle storage errors.
+    """
+
+    def __init__(self, name, directory=None):
+        """Initialize the cache.
+
+        Args:
+            name: File name (without extension) of the cache database
+            directory: Directory holding the cache file (default: DEFAULT_CACHE_DIR)
+        """
+        self.path = os.path.join(directory or DEFAULT_CACHE_DIR, f"{name}.sqlite3")
+        self._conn = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Open the database on first use; return None if unavailable."""
+        if self._conn is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+                )
+                conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+                self._conn = conn
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Disk cache {self.path} unavailable, caching disabled: {str(e)}")
+                self._disabled = True
+        return self._conn
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache read failed: {str(e)}")
+                return None
+
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return json.loads(value)
+
+    def set(self, key, value, expire=None):
+        """Store value under key.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            expire: Lifetime in seconds (None keeps the entry indefinitely)
+        """
+        expires_at = time.time() + expire if expire else None
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache write failed: {str(e)}")
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            conn = self._connect()
+            if conn is not None:
+                conn.execute("DELETE FROM cache")
+
+
+class SearchResultCache:
+    """Thread-safe in-memory LRU cache whose entries expire after a fixed TTL.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize=256, ttl=3600):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries; the least recently used is evicted
+            ttl: Lifetime of an entry in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+class _Call:
+    """A call in progress that other callers with the same key can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running block and receive the same result (or exception). The
+    result object is shared between callers, so it must be treated as
+    read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Return fn() for key, running it at most once among concurrent callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()